@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from BACKTEST.main_backtesting import run_backtest, BacktestCancelled
+from BACKTEST.rdi_backtest import RDIBacktestStrategy
+
+RUN_STORE_DIR = "data/backtest_runs"
+
+# Strategies that can be run as jobs, by name, so jobs stay picklable and cache keys stable
+STRATEGIES = {
+    "RDI": RDIBacktestStrategy,
+}
+
+
+def data_fingerprint(data: pd.DataFrame) -> str:
+    """Content hash of the OHLCV frame (rows, bounds and every value)."""
+    h = hashlib.sha256()
+    h.update(str(len(data)).encode())
+    if len(data):
+        h.update(str(data["timestamp"].iloc[0]).encode())
+        h.update(str(data["timestamp"].iloc[-1]).encode())
+        cols = [c for c in ("open", "high", "low", "close", "volume") if c in data.columns]
+        h.update(pd.util.hash_pandas_object(data[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def run_key(fingerprint: str, strategy: str, params: dict) -> str:
+    payload = json.dumps({"data": fingerprint, "strategy": strategy, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RunStore:
+    """Persistent backtest results on disk, one pickle per (data fingerprint, strategy, params)."""
+
+    def __init__(self, root=RUN_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, results):
+        tmp = f"{self._path(key)}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+
+def _run_job(key, strategy, params, data, initial_capital, status, cancel_event, store_root):
+    # Runs in a worker process; talks back only through the managed `status` dict
+    def progress(fraction):
+        status[key] = {**status[key], "progress": fraction}
+
+    status[key] = {**status[key], "state": "running", "started": time.time()}
+    try:
+        results = run_backtest(STRATEGIES[strategy](**params), data,
+                               initial_capital=initial_capital,
+                               progress=progress, should_stop=cancel_event.is_set)
+    except BacktestCancelled:
+        status[key] = {**status[key], "state": "cancelled"}
+        return None
+    except Exception as e:
+        status[key] = {**status[key], "state": "failed", "error": repr(e)}
+        return None
+
+    RunStore(store_root).put(key, results)
+    status[key] = {**status[key], "state": "done", "progress": 1.0, "finished": time.time()}
+    return key
+
+
+class BacktestJobs:
+    """
+    Local worker pool for backtests with progress, cancellation and a result cache.
+
+    `submit` returns immediately with a run key; identical requests (same data
+    fingerprint, strategy and params) are served from the RunStore or joined
+    to the job already computing them.
+    """
+
+    def __init__(self, max_workers=None, store_root=RUN_STORE_DIR):
+        ctx = mp.get_context("spawn")
+        self.store = RunStore(store_root)
+        self.manager = ctx.Manager()
+        self.status = self.manager.dict()
+        self.cancel_events = {}
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=max_workers or max(1, (os.cpu_count() or 2) - 1), mp_context=ctx)
+
+    def submit(self, data: pd.DataFrame, strategy: str, params: dict, initial_capital: float = 100_000,
+               fingerprint: str = None) -> str:
+        fingerprint = fingerprint or data_fingerprint(data)
+        key = run_key(fingerprint, strategy, {**params, "initial_capital": initial_capital})
+
+        with self.lock:
+            if key in self.store:
+                self.status[key] = {"state": "done", "progress": 1.0, "cached": True}
+                return key
+            future = self.futures.get(key)
+            if future is not None and not future.done():
+                return key
+
+            cancel_event = self.manager.Event()
+            self.cancel_events[key] = cancel_event
+            self.status[key] = {"state": "queued", "progress": 0.0, "strategy": strategy, "params": params}
+            self.futures[key] = self.pool.submit(_run_job, key, strategy, params, data, initial_capital,
+                                                 self.status, cancel_event, self.store.root)
+        return key
+
+    def state(self, key) -> dict:
+        return dict(self.status.get(key, {"state": "unknown", "progress": 0.0}))
+
+    def result(self, key):
+        """Stored results for `key`, or None if the run is not finished."""
+        return self.store.get(key)
+
+    def cancel(self, key):
+        with self.lock:
+            future = self.futures.get(key)
+            if future is not None and future.cancel():
+                # Never started: drop it from the queue
+                self.status[key] = {**self.status[key], "state": "cancelled"}
+            elif key in self.cancel_events:
+                self.cancel_events[key].set()
+
+    def shutdown(self):
+        for event in self.cancel_events.values():
+            event.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
@@ -4,7 +4,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from abc import ABC, abstractmethod
-from DYNAMICS.dynamic_params import PARQUET_PATH
+from DYNAMICS.dynamic_params import PARQUET_PATH, STORE_PATH, LEAN_MEMORY
+from MNDB.candle_store import load_candles
 
 #from custom_ta.rdi import compute_rdi
 #from backtest.rdi_backtest_skeleton import RDIBacktestStrategy
@@ -18,11 +19,20 @@ class Strategy(ABC):
         """
         pass
 
-def load_data(filepath=PARQUET_PATH) -> pd.DataFrame:
-    """Load historical OHLC data from a Parquet file and return a time-sorted DataFrame."""
+def load_data(filepath=PARQUET_PATH, store_path=STORE_PATH, start=None, end=None, columns=None,
+              lean: bool = LEAN_MEMORY) -> pd.DataFrame:
+    """
+    Load historical OHLC data and return a time-sorted DataFrame.
+
+    Maps the columnar candle store zero-copy when it exists (it is kept sorted);
+    pass store_path=None to force reading the Parquet file. `start` (inclusive) and
+    `end` (exclusive) restrict the time range and `columns` the fields read;
+    'timestamp' is always included. `lean` returns float32 prices where precision allows.
+    """
     try:
-        df = pd.read_parquet(filepath)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df = load_candles(store_path, filepath, start, end, columns, lean)
+        if df["timestamp"].is_monotonic_increasing:
+            return df
         return df.sort_values("timestamp").reset_index(drop=True)
     except Exception as e:
         print(f"Error loading data: {e}")
@@ -66,37 +76,63 @@ def annualized_return(final_equity: float, initial_capital: float, n_periods: in
         return np.nan
     return (final_equity / initial_capital) ** (periods_per_year / n_periods) - 1
 
+TRADE_COLUMNS = ["entry_time", "entry_price", "exit_time", "exit_price", "return", "duration_bars"]
+
+class BacktestCancelled(Exception):
+    """Raised inside run_backtest when `should_stop` asks the simulation to stop."""
+
+
 def run_backtest(strategy: Strategy,
                  data: pd.DataFrame,
                  initial_capital: float = 100_000,
-                 periods_per_year: float = 12) -> dict: #252
+                 periods_per_year: float = 12, #252
+                 progress=None,
+                 should_stop=None,
+                 lean: bool = LEAN_MEMORY) -> dict:
     """
     Run a backtest simulation using the provided strategy.
 
     - Long entry when signal flips 0→1, exit 1→0
     - Equity curve tracks realized + unrealized PnL
+    - `progress(fraction)` is called periodically and `should_stop()` is polled
+      at the same points; returning True raises BacktestCancelled
+    - `lean` skips the deep copy of `data` (copy-on-write keeps the caller's
+      frame intact), drops open/high/low/volume from the result and stores
+      position/signal_change as int8 and trade_price as float32
 
     Returns dict with:
       - 'data': DataFrame with simulation
       - 'trades': DataFrame of each trade
       - 'summary': dict of performance metrics
     """
-    data = strategy.generate_signals(data.copy())
-    data["position"]      = 0
-    data["trade_price"]   = np.nan
-    data["equity"]        = initial_capital
-    data["signal_change"] = data["signal"].diff().fillna(0)
+    data = strategy.generate_signals(data.copy(deep=not lean))
+    n_bars = len(data)
+    if lean:
+        data = data.drop(columns=[c for c in ("open", "high", "low", "volume") if c in data.columns])
+        data["position"]      = np.zeros(n_bars, dtype=np.int8)
+        data["trade_price"]   = np.full(n_bars, np.nan, dtype=np.float32)
+        data["equity"]        = float(initial_capital)
+        data["signal_change"] = data["signal"].diff().fillna(0).astype(np.int8)
+    else:
+        data["position"]      = 0
+        data["trade_price"]   = np.nan
+        data["equity"]        = float(initial_capital)
+        data["signal_change"] = data["signal"].diff().fillna(0)
 
     current_capital = initial_capital
     position        = 0
     buy_price       = None
     trade_log       = []
-    equity_curve    = []
+    report_every    = max(1, n_bars // 100)
 
-    # Iterate bars
-    for i, row in data.iterrows():
-        sig   = row["signal"]
-        price = row["close"]
+    # Iterate bars over the three columns the loop reads (iterrows would box the whole frame)
+    bars = zip(data.index, data["signal"].to_numpy(), data["close"].to_numpy(), data["timestamp"])
+    for bar, (i, sig, price, timestamp) in enumerate(bars):
+        if bar % report_every == 0:
+            if should_stop is not None and should_stop():
+                raise BacktestCancelled()
+            if progress is not None:
+                progress(bar / n_bars)
 
         # ENTRY
         if position == 0 and sig == 1:
@@ -104,7 +140,7 @@ def run_backtest(strategy: Strategy,
             buy_price = price
             data.at[i, "trade_price"] = buy_price
             trade   = {
-                "entry_time": row["timestamp"],
+                "entry_time": timestamp,
                 "entry_price": buy_price,
                 "exit_time": None,
                 "exit_price": None,
@@ -120,7 +156,7 @@ def run_backtest(strategy: Strategy,
             position = 0
             data.at[i, "trade_price"] = sell_price
 
-            trade["exit_time"]    = row["timestamp"]
+            trade["exit_time"]    = timestamp
             trade["exit_price"]   = sell_price
             trade["return"]       = trade_return
             trade["duration_bars"]= i - data.index[data["trade_price"].first_valid_index()]  # or custom
@@ -135,14 +171,16 @@ def run_backtest(strategy: Strategy,
         else:
             data.at[i, "equity"] = current_capital
 
-        equity_curve.append(data.at[i, "equity"])
+    if progress is not None:
+        progress(1.0)
 
-    data["equity_curve"] = equity_curve
-    eq_series           = pd.Series(equity_curve, index=data["timestamp"])
+    # Same values as "equity"; copy-on-write shares the buffer until one of them is written
+    data["equity_curve"] = data["equity"]
+    eq_series           = pd.Series(data["equity"].to_numpy(), index=data["timestamp"])
     returns             = eq_series.pct_change().fillna(0)
 
     # Basic stats
-    final_equity     = equity_curve[-1]
+    final_equity     = float(eq_series.iloc[-1])
     cumulative_ret   = (final_equity - initial_capital) / initial_capital
     max_dd           = compute_max_drawdown(eq_series)
     cagr             = annualized_return(final_equity, initial_capital, len(returns), periods_per_year)
@@ -155,7 +193,7 @@ def run_backtest(strategy: Strategy,
         calmar = cumulative_ret / abs(max_dd)
 
     # Trade stats
-    trades_df      = pd.DataFrame(trade_log)
+    trades_df      = pd.DataFrame(trade_log, columns=TRADE_COLUMNS)
     total_trades   = len(trades_df)
     wins           = trades_df[trades_df["return"] >= 0]
     losses         = trades_df[trades_df["return"] <= 0]
@@ -186,4 +224,66 @@ def run_backtest(strategy: Strategy,
         "data": data,
         "trades": trades_df,
         "summary": summary
-    }
\ No newline at end of file
+    }
+
+def _pipeline_peak_rss(parquet_path: str, lean: bool) -> list:
+    # Runs in a fresh process: load -> SMA -> RDI backtest -> monthly returns, peak RSS (MB) after each stage
+    import resource
+    from CUSTOMTA.main_sma import compute_sma
+    from BACKTEST.rdi_backtest import RDIBacktestStrategy
+
+    def peak():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    stages = [("start", peak())]
+    df = load_data(parquet_path, store_path=None, lean=lean)
+    stages.append(("load", peak()))
+    sma = compute_sma(df, lean=lean)
+    stages.append(("compute_sma", peak()))
+    results = run_backtest(RDIBacktestStrategy(lean=lean), df, lean=lean)
+    stages.append(("run_backtest", peak()))
+    sim_data = results["data"]
+    month_year = sim_data["timestamp"].dt.tz_localize(None).dt.to_period("M")
+    sim_data["equity_curve"].groupby(month_year).last().pct_change()
+    stages.append(("monthly returns", peak()))
+    return stages
+
+
+if __name__ == "__main__":
+    # Peak RSS of the analytics pipeline with and without lean mode, each in a fresh process
+    import os
+    import sys
+    import tempfile
+    import time
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = np.random.default_rng(3)
+    close = np.round(30_000 * np.exp(np.cumsum(rng.normal(0, 1e-3, N))), 1)
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2000-01-01", periods=N, freq="5min", tz="UTC"),
+        "open": open_,
+        "high": np.round(np.maximum(open_, close) * (1 + rng.random(N) * 1e-3), 1),
+        "low": np.round(np.minimum(open_, close) * (1 - rng.random(N) * 1e-3), 1),
+        "close": close,
+        "volume": np.round(rng.random(N) * 10, 8),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.parquet")
+        frame.to_parquet(path, index=False)
+        raw_mb = frame.memory_usage(deep=True).sum() / 2 ** 20
+        del frame
+
+        runs = {}
+        for lean in (False, True):
+            with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+                t0 = time.perf_counter()
+                runs[lean] = pool.submit(_pipeline_peak_rss, path, lean).result()
+                print(f"lean={lean!s:<5}: {time.perf_counter() - t0:.0f}s")
+
+    print(f"{N:,} bars, raw OHLCV frame {raw_mb:.0f} MB; peak RSS in MB after each stage")
+    for (stage, default), (_, lean) in zip(runs[False], runs[True]):
+        print(f"{stage:<16} default {default:7.0f}   lean {lean:7.0f}")
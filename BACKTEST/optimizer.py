@@ -0,0 +1,282 @@
+import math
+import os
+import random
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from BACKTEST.main_backtesting import run_backtest
+from BACKTEST.backtest_jobs import STRATEGIES, RunStore, data_fingerprint, run_key
+
+OPTIMIZER_CACHE_DIR = "data/optimizer_cache"
+
+# Search space for RDIBacktestStrategy: parameter -> candidate values
+RDI_SPACE = {
+    "period": [5, 8, 10, 14, 20],
+    "buy_threshold": [0.2, 0.25, 0.3, 0.35, 0.4, 0.45],
+    "entry_threshold": [1, 2, 3, 4, 5, 6],
+}
+
+
+# ------------------------------
+# Worker side
+# ------------------------------
+_worker_data = None
+
+
+def _init_worker(data):
+    # The candle frame is shipped once per worker instead of once per task
+    global _worker_data
+    _worker_data = data
+
+
+def _evaluate(strategy, params, n_bars, initial_capital):
+    data = _worker_data.iloc[-n_bars:].reset_index(drop=True)
+    return run_backtest(STRATEGIES[strategy](**params), data, initial_capital=initial_capital)["summary"]
+
+
+def _score(summary, metric):
+    value = summary.get(metric, np.nan)
+    return -math.inf if value is None or not np.isfinite(value) else float(value)
+
+
+# ------------------------------
+# Samplers
+# ------------------------------
+class RandomSampler:
+    def __init__(self, space: dict, seed=None):
+        self.space = space
+        self.rng = random.Random(seed)
+
+    def sample(self, history) -> dict:
+        return {name: self.rng.choice(values) for name, values in self.space.items()}
+
+
+class TPESampler(RandomSampler):
+    """
+    Tree-structured Parzen Estimator over a discrete space.
+
+    Past trials are split into the best `gamma` fraction and the rest; each
+    parameter gets a smoothed categorical density for both groups, and the
+    candidate maximizing l(x) / g(x) out of `n_candidates` draws from l(x) is
+    proposed. Falls back to random sampling until `n_startup` trials exist.
+    """
+
+    def __init__(self, space: dict, seed=None, gamma=0.25, n_startup=10, n_candidates=24):
+        super().__init__(space, seed)
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+
+    def _density(self, trials, name):
+        values = self.space[name]
+        counts = np.ones(len(values))  # uniform prior keeps every value reachable
+        for params, _ in trials:
+            counts[values.index(params[name])] += 1
+        return counts / counts.sum()
+
+    def sample(self, history) -> dict:
+        if len(history) < self.n_startup:
+            return super().sample(history)
+
+        ranked = sorted(history, key=lambda t: t[1], reverse=True)
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good, bad = ranked[:n_good], ranked[n_good:]
+
+        l = {name: self._density(good, name) for name in self.space}
+        g = {name: self._density(bad, name) for name in self.space}
+
+        best, best_ratio = None, -math.inf
+        for _ in range(self.n_candidates):
+            idx = {name: self.rng.choices(range(len(values)), weights=l[name])[0]
+                   for name, values in self.space.items()}
+            ratio = sum(math.log(l[name][i]) - math.log(g[name][i]) for name, i in idx.items())
+            if ratio > best_ratio:
+                best_ratio = ratio
+                best = {name: self.space[name][i] for name, i in idx.items()}
+        return best
+
+
+SAMPLERS = {"random": RandomSampler, "tpe": TPESampler}
+
+
+# ------------------------------
+# Optimizer
+# ------------------------------
+class StrategyOptimizer:
+    """
+    Successive halving / Hyperband search over strategy parameters.
+
+    Configurations are first backtested on the most recent `min_bars` bars;
+    only the best 1/eta of each rung is promoted to an eta times longer slice,
+    up to the full history. Evaluations run on a process pool and summaries
+    are cached on disk by (slice fingerprint, strategy, params), so repeated
+    searches and configurations shared between brackets are never re-run.
+    """
+
+    def __init__(self, data: pd.DataFrame, space: dict = RDI_SPACE, strategy: str = "RDI",
+                 metric: str = "Sharpe_ratio", sampler: str = "tpe", initial_capital: float = 100_000,
+                 max_workers=None, cache_dir=OPTIMIZER_CACHE_DIR, seed=None):
+        self.data = data.reset_index(drop=True)
+        self.space = space
+        self.strategy = strategy
+        self.metric = metric
+        self.initial_capital = initial_capital
+        self.sampler = SAMPLERS[sampler](space, seed=seed)
+        self.cache = RunStore(cache_dir) if cache_dir else None
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.pool = None
+        self._fingerprints = {}
+        self._memo = {}
+        self.trials = []          # (params, n_bars, score), in evaluation order
+        self.bars_simulated = 0   # compute actually spent (cache hits are free)
+        self.cache_hits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.max_workers, mp_context=mp.get_context("spawn"),
+                                            initializer=_init_worker, initargs=(self.data,))
+        return self.pool
+
+    def _key(self, params, n_bars):
+        if n_bars not in self._fingerprints:
+            self._fingerprints[n_bars] = data_fingerprint(self.data.iloc[-n_bars:].reset_index(drop=True))
+        return run_key(self._fingerprints[n_bars], self.strategy,
+                       {**params, "initial_capital": self.initial_capital})
+
+    def evaluate(self, configs, n_bars) -> list:
+        """Scores for `configs` on the last `n_bars` bars, from the cache where possible."""
+        n_bars = min(n_bars, len(self.data))
+        summaries = [None] * len(configs)
+        pending = {}
+        for i, params in enumerate(configs):
+            key = self._key(params, n_bars)
+            cached = self._memo.get(key)
+            if cached is None and self.cache:
+                cached = self.cache.get(key)
+            if cached is not None:
+                summaries[i] = cached
+                self.cache_hits += 1
+            else:
+                pending.setdefault(key, []).append(i)
+
+        futures = {key: self._pool().submit(_evaluate, self.strategy, configs[idx[0]], n_bars,
+                                            self.initial_capital)
+                   for key, idx in pending.items()}
+        for key, future in futures.items():
+            summary = future.result()
+            self.bars_simulated += n_bars
+            self._memo[key] = summary
+            if self.cache:
+                self.cache.put(key, summary)
+            for i in pending[key]:
+                summaries[i] = summary
+
+        scores = [_score(s, self.metric) for s in summaries]
+        self.trials.extend((params, n_bars, score) for params, score in zip(configs, scores))
+        return scores
+
+    def _history(self):
+        # The sampler learns from the longest slice each configuration reached
+        best = {}
+        for params, n_bars, score in self.trials:
+            key = tuple(sorted(params.items()))
+            if key not in best or n_bars >= best[key][1]:
+                best[key] = (params, n_bars, score)
+        return [(params, score) for params, _, score in best.values()]
+
+    def _sample(self, n):
+        configs, seen = [], set()
+        attempts = 0
+        while len(configs) < n and attempts < n * 20:
+            attempts += 1
+            params = self.sampler.sample(self._history())
+            key = tuple(sorted(params.items()))
+            if key not in seen:
+                seen.add(key)
+                configs.append(params)
+        return configs
+
+    def successive_halving(self, n_configs: int, min_bars: int, eta: int = 3) -> tuple:
+        """One bracket: n_configs on min_bars, keeping the top 1/eta per rung up to the full history."""
+        configs = self._sample(n_configs)
+        n_bars = min_bars
+        while True:
+            scores = self.evaluate(configs, n_bars)
+            ranked = sorted(zip(scores, range(len(configs))), reverse=True)
+            if n_bars >= len(self.data) or len(configs) == 1:
+                score, i = ranked[0]
+                return configs[i], score
+            keep = max(1, len(configs) // eta)
+            configs = [configs[i] for _, i in ranked[:keep]]
+            n_bars = min(len(self.data), n_bars * eta)
+
+    def hyperband(self, min_bars: int = None, eta: int = 3, rounds: int = 1) -> dict:
+        """
+        Run Hyperband: successive halving brackets from aggressive (many configs,
+        short slices) to conservative (few configs, full history), `rounds` times.
+        Later rounds sample from everything learned so far when using TPE.
+        """
+        max_bars = len(self.data)
+        min_bars = min_bars or max(50, max_bars // eta ** 3)
+        s_max = int(math.floor(math.log(max_bars / min_bars, eta) + 1e-9))
+
+        best_params, best_score = None, -math.inf
+        for s in [s for _ in range(rounds) for s in range(s_max, -1, -1)]:
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            params, score = self.successive_halving(n, int(max_bars / eta ** s), eta)
+            if score > best_score:
+                best_params, best_score = params, score
+        return self.report(best_params, best_score)
+
+    def grid(self) -> dict:
+        """Exhaustive search on the full history, for comparison."""
+        names = list(self.space)
+        configs = [dict(zip(names, values)) for values in product(*self.space.values())]
+        scores = self.evaluate(configs, len(self.data))
+        score, i = max(zip(scores, range(len(configs))))
+        return self.report(configs[i], score)
+
+    def report(self, params, score) -> dict:
+        return {"best_params": params, "best_score": score, "metric": self.metric,
+                "evaluations": len(self.trials), "bars_simulated": self.bars_simulated,
+                "cache_hits": self.cache_hits}
+
+
+if __name__ == "__main__":
+    # Hyperband vs. an exhaustive grid over RDI_SPACE on the local history
+    from BACKTEST.main_backtesting import load_data
+
+    data = load_data()
+    grid_size = math.prod(len(v) for v in RDI_SPACE.values())
+    print(f"{len(data)} bars, {grid_size} configurations in the grid")
+
+    results = {}
+    for name, run in [("grid", lambda o: o.grid()),
+                      ("hyperband+random", lambda o: o.hyperband(rounds=3)),
+                      ("hyperband+tpe", lambda o: o.hyperband(rounds=3))]:
+        sampler = "random" if name.endswith("random") else "tpe"
+        with StrategyOptimizer(data, sampler=sampler, cache_dir=None, seed=1) as opt:
+            t0 = time.perf_counter()
+            results[name] = run(opt)
+            results[name]["seconds"] = time.perf_counter() - t0
+
+    full = results["grid"]
+    for name, r in results.items():
+        print(f"{name:<17}: {r['bars_simulated']:>9,} bars ({r['bars_simulated'] / full['bars_simulated']:6.1%} of grid), "
+              f"{r['seconds']:6.1f}s, best {r['metric']} {r['best_score']:.4f} with {r['best_params']}")
@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
 from CUSTOMTA.main_rdi import compute_rdi
+from DYNAMICS.dynamic_params import LEAN_MEMORY
 
 
 class Strategy(ABC):
@@ -14,14 +16,23 @@ class Strategy(ABC):
 
 
 class RDIBacktestStrategy(Strategy):
-    def __init__(self, entry_threshold: int = 3):
+    def __init__(self, entry_threshold: int = 3, period: int = 10, buy_threshold: float = 0.35,
+                 sell_threshold: float = -0.3, lean: bool = LEAN_MEMORY):
         """
         Initialize the RDI-based strategy.
 
         Args:
             entry_threshold (int): Number of consecutive bars (streak) required to generate a buy signal.
+            period (int): EMA period passed to compute_rdi.
+            buy_threshold (float): RDI level a bar must exceed to extend the buy streak.
+            sell_threshold (float): RDI level for the sell streak.
+            lean (bool): Compact columns: float32 'rdi', int32 streaks and an int8 'signal'.
         """
         self.entry_threshold = entry_threshold
+        self.period = period
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.lean = lean
 
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -31,14 +42,15 @@ class RDIBacktestStrategy(Strategy):
         """
         # Compute RDI and streak using our previously developed compute_rdi logic.
 
-        rdi_result = compute_rdi(data)
+        rdi_result = compute_rdi(data, period=self.period, buy_threshold=self.buy_threshold,
+                                 sell_threshold=self.sell_threshold, lean=self.lean)
 
         data["buy_streak"] = rdi_result["buy_streak"]
         data["sell_streak"] = rdi_result["sell_streak"]
         data["rdi"] = rdi_result["rdi"]
 
         # 🚨 Remove or modify 'streak' logic since it's now split into buy/sell streaks
-        data["signal"] = 0
+        data["signal"] = np.zeros(len(data), dtype=np.int8 if self.lean else np.int64)
 
         # 📌 Adjust signal logic:
         # Set signal to 1 when buy streak meets or exceeds entry_threshold
@@ -0,0 +1,262 @@
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from CUSTOMTA.main_rdi import _atr_threshold, _run_lengths
+
+BASE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Output dtypes with lean=True; every other float64 output becomes float32
+LEAN_DTYPES = {"direction": np.int8, "Signal": np.int8, "Position": np.int8,
+               "buy_streak": np.int32, "sell_streak": np.int32}
+
+
+class Indicator:
+    """One node of the indicator graph: `name` is computed by `fn` from `inputs`."""
+
+    def __init__(self, name: str, inputs: tuple, fn):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.fn = fn
+        # Keyword parameters (with defaults) this node accepts, e.g. period=10
+        self.params = {p.name: p.default for p in inspect.signature(fn).parameters.values()
+                       if p.kind == p.KEYWORD_ONLY}
+
+    def __call__(self, values: dict, params: dict) -> pd.Series:
+        kwargs = {k: params[k] for k in self.params if k in params}
+        return self.fn(*(values[i] for i in self.inputs), **kwargs)
+
+    def __repr__(self):
+        return f"Indicator({self.name!r}, inputs={self.inputs})"
+
+
+REGISTRY = {}
+
+
+def register(name: str, inputs=()):
+    """Decorator adding `fn` to the registry as the producer of column `name`."""
+    def wrap(fn):
+        REGISTRY[name] = Indicator(name, inputs, fn)
+        return fn
+    return wrap
+
+
+# ------------------------------
+# Shared intermediates
+# ------------------------------
+@register("body", ("close", "open"))
+def _body(close, open_):
+    return (close - open_).abs()
+
+
+@register("bar_range", ("high", "low"))
+def _bar_range(high, low):
+    return high - low
+
+
+@register("direction", ("close", "open"))
+def _direction(close, open_):
+    return (close > open_).astype(int) * 2 - 1
+
+
+@register("Market_Return", ("close",))
+def _market_return(close):
+    return close.pct_change()
+
+
+@register("true_range", ("high", "low", "close"))
+def _true_range(high, low, close):
+    prev_close = close.shift(1)
+    return pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+
+
+# ------------------------------
+# RDI
+# ------------------------------
+@register("conviction", ("body", "bar_range"))
+def _conviction(body, bar_range):
+    return body / bar_range.replace(0, 1e-9)
+
+
+@register("rdi", ("direction", "conviction"))
+def _rdi(direction, conviction, *, period=10):
+    return (direction * conviction).ewm(span=period, adjust=False).mean()
+
+
+@register("ATR", ("true_range",))
+def _atr(true_range, *, atr_length=14):
+    # Wilder smoothing seeded with the first full-window mean, as in ta's AverageTrueRange
+    atr = np.zeros(len(true_range))
+    if len(true_range) >= atr_length:
+        tail = true_range.iloc[atr_length - 1:].copy()
+        tail.iloc[0] = true_range.iloc[:atr_length].mean()
+        atr[atr_length - 1:] = tail.ewm(alpha=1 / atr_length, adjust=False).mean().to_numpy()
+    return pd.Series(atr, index=true_range.index)
+
+
+@register("atr_active", ("ATR",))
+def _atr_active(atr, *, atr_filter="global", atr_window=None):
+    return atr > _atr_threshold(atr, atr_filter, atr_window)
+
+
+@register("buy_streak", ("rdi", "atr_active"))
+def _buy_streak(rdi, active, *, buy_threshold=0.35):
+    mask = ((rdi > buy_threshold) & active).to_numpy()
+    return pd.Series(_run_lengths(mask), index=rdi.index)
+
+
+@register("sell_streak", ("rdi",))
+def _sell_streak(rdi, *, sell_threshold=-0.3):
+    # Selling is disabled in compute_rdi: the streak never grows
+    return pd.Series(0, index=rdi.index)
+
+
+# ------------------------------
+# SMA
+# ------------------------------
+@register("SMA", ("close",))
+def _sma(close, *, sma_period=73):
+    return close.rolling(window=sma_period).median()
+
+
+@register("SMA2", ("close",))
+def _sma2(close, *, sma_period=73):
+    return close.rolling(window=sma_period).mean()
+
+
+@register("EWA", ("close",))
+def _ewa(close, *, ewa_period=150):
+    return close.ewm(span=ewa_period, adjust=False).mean()
+
+
+@register("Signal", ("close", "SMA"))
+def _signal(close, sma, *, signal_warmup=20):
+    signal = np.zeros(len(close), dtype=np.int64)
+    signal[signal_warmup:] = np.where(close.to_numpy()[signal_warmup:] > sma.to_numpy()[signal_warmup:], 1, -1)
+    return pd.Series(signal, index=close.index)
+
+
+@register("Position", ("Signal",))
+def _position(signal):
+    return signal.diff()
+
+
+@register("Strategy_Return", ("Market_Return", "Signal"))
+def _strategy_return(market_return, signal):
+    return market_return * signal.shift(1)
+
+
+@register("Cumulative_Market", ("Market_Return",))
+def _cumulative_market(market_return):
+    return (1 + market_return).cumprod()
+
+
+@register("Cumulative_Strategy", ("Strategy_Return",))
+def _cumulative_strategy(strategy_return):
+    return (1 + strategy_return).cumprod()
+
+
+# ------------------------------
+# Planner
+# ------------------------------
+def plan(outputs) -> list:
+    """
+    Dependency levels needed to produce `outputs`.
+
+    Each level is a list of indicator names whose inputs are all available
+    from earlier levels (or the base OHLCV columns), so the nodes within a
+    level are independent and can run in parallel. Every intermediate
+    appears exactly once.
+    """
+    needed = set()
+    stack = list(outputs)
+    while stack:
+        name = stack.pop()
+        if name in needed or name in BASE_COLUMNS:
+            continue
+        if name not in REGISTRY:
+            raise KeyError(f"Unknown indicator: {name}")
+        needed.add(name)
+        stack.extend(REGISTRY[name].inputs)
+
+    levels, done = [], set(BASE_COLUMNS)
+    while needed:
+        ready = sorted(n for n in needed if all(i in done for i in REGISTRY[n].inputs))
+        if not ready:
+            raise ValueError(f"Indicator graph has a cycle among: {sorted(needed)}")
+        levels.append(ready)
+        done.update(ready)
+        needed.difference_update(ready)
+    return levels
+
+
+def _narrow(name: str, values: pd.Series) -> pd.Series:
+    dtype = LEAN_DTYPES.get(name)
+    if dtype is not None:
+        # Leading NaNs (e.g. Position's first diff) become 0
+        return (values.fillna(0) if values.dtype.kind == "f" else values).astype(dtype)
+    return values.astype(np.float32) if values.dtype == np.float64 else values
+
+
+def compute_indicators(df: pd.DataFrame, outputs, max_workers: int = 4, lean: bool = False,
+                       **params) -> pd.DataFrame:
+    """
+    Compute the requested indicators in one pass over the dependency graph.
+
+    Intermediates are dropped as soon as no later node needs them.
+
+    Args:
+        df (pd.DataFrame): OHLCV frame. Never modified.
+        outputs (iterable of str): Indicator names, e.g. ["rdi", "buy_streak", "SMA", "EWA"].
+        max_workers (int, optional): Threads for independent nodes of the same level. Defaults to 4.
+        lean (bool, optional): Narrow each output once nothing else reads it: int8 signals,
+            int32 streaks and float32 for the rest (see LEAN_DTYPES). Defaults to False.
+        **params: Indicator parameters by name (period, buy_threshold, atr_filter, sma_period, ...);
+            each node picks the ones it declares and uses its own defaults for the rest.
+
+    Returns:
+        pd.DataFrame: One column per requested output, aligned with `df.index`.
+    """
+    outputs = list(outputs)
+    unknown = set(params) - {p for ind in REGISTRY.values() for p in ind.params}
+    if unknown:
+        raise TypeError(f"Unknown indicator parameters: {sorted(unknown)}")
+
+    levels = plan(outputs)
+    base = {c for level in levels for n in level for c in REGISTRY[n].inputs if c in BASE_COLUMNS}
+    base.update(c for c in outputs if c in BASE_COLUMNS)
+    missing = base - set(df.columns)
+    if missing:
+        raise ValueError(f"Input DataFrame is missing required columns: {missing}")
+
+    # Readers left per column, so each one is released (or narrowed) after its last use
+    readers = {}
+    for level in levels:
+        for name in level:
+            for i in REGISTRY[name].inputs:
+                readers[i] = readers.get(i, 0) + 1
+
+    # Column reads only; results live in `values`, never in `df`
+    values = {c: df[c] for c in base}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level in levels:
+            if len(level) == 1 or max_workers <= 1:
+                results = [REGISTRY[name](values, params) for name in level]
+            else:
+                results = list(pool.map(lambda name: REGISTRY[name](values, params), level))
+            values.update(zip(level, results))
+
+            done = [i for name in level for i in REGISTRY[name].inputs] + [n for n in level if n not in readers]
+            for name in done:
+                readers[name] = readers.get(name, 1) - 1
+                if readers[name] > 0 or name not in values:
+                    continue
+                if name not in outputs:
+                    del values[name]
+                elif lean and name not in BASE_COLUMNS:
+                    values[name] = _narrow(name, values[name])
+
+    # copy=False: the outputs become the columns as they are, without a consolidating copy
+    return pd.DataFrame({name: values[name] for name in outputs}, index=df.index, copy=False)
@@ -3,8 +3,25 @@ import numpy as np
 
 from ta.volatility import AverageTrueRange
 
+from CUSTOMTA.rolling_quantile import causal_quantile
+from DYNAMICS.dynamic_params import LEAN_MEMORY
 
-def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35, sell_threshold: float = -0.3) -> pd.DataFrame:
+
+def _atr_threshold(atr: pd.Series, atr_filter: str = "global", atr_window: int = None, atr_percentile: float = 60):
+    """
+    ATR level a bar must exceed to count as active.
+
+    "global" uses one percentile over the whole history (looks ahead; the original behaviour),
+    "rolling" an exact causal percentile over the last `atr_window` bars (expanding if None),
+    "p2" a bounded-memory streaming estimate of the expanding percentile.
+    """
+    if atr_filter == "global":
+        return np.percentile(atr.dropna(), atr_percentile)
+    return causal_quantile(atr, atr_percentile / 100, atr_filter, atr_window)
+
+
+def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35, sell_threshold: float = -0.3,
+                atr_filter: str = "global", atr_window: int = None, lean: bool = LEAN_MEMORY) -> pd.DataFrame:
     """
     Compute the Relative Directional Index (RDI) and track entry streaks for buying and selling signals.
 
@@ -22,6 +39,11 @@ def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35,
         period (int, optional): The period for the EMA calculation. Defaults to 10.
         buy_threshold (float, optional): Threshold for confirming buy signal. Defaults to 0.3.
         sell_threshold (float, optional): Threshold for confirming sell signal. Defaults to -0.3.
+        atr_filter (str, optional): How the ATR 60th percentile gate is computed: "global" (whole
+            history, default), "rolling" (exact, causal, over `atr_window` bars) or "p2" (streaming estimate).
+        atr_window (int, optional): Window for "rolling"; None means expanding. Defaults to None.
+        lean (bool, optional): Compute through the indicator graph without adding 'ATR' to `df`;
+            'rdi' is float32 and the streaks int32. Defaults to LEAN_MEMORY.
 
     Returns:
         pd.DataFrame: A DataFrame with columns:
@@ -34,6 +56,13 @@ def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35,
         missing = required_columns - set(df.columns)
         raise ValueError(f"Input DataFrame is missing required columns: {missing}")
 
+    if lean:
+        # Imported here: the registry itself imports this module
+        from CUSTOMTA.indicator_registry import compute_indicators
+        return compute_indicators(df, ["rdi", "buy_streak", "sell_streak"], max_workers=1, lean=True, period=period,
+                                  buy_threshold=buy_threshold, sell_threshold=sell_threshold,
+                                  atr_filter=atr_filter, atr_window=atr_window)
+
     # Calculate candle body and range
     body = (df["close"] - df["open"]).abs()
     range_ = df["high"] - df["low"]
@@ -59,9 +88,9 @@ def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35,
     df['ATR'] = atr_indicator.average_true_range()
 
     # Calculate the 60th percentile of ATR values
-    atr_60th_percentile = np.percentile(df['ATR'].dropna(), 60)
+    atr_60th_percentile = _atr_threshold(df['ATR'], atr_filter, atr_window)
 
-    is_active = atr_indicator.average_true_range() > atr_60th_percentile
+    is_active = df['ATR'] > atr_60th_percentile
 
     clean_RDI = [1 if r else 0 for r in is_active ]
 
@@ -92,4 +121,92 @@ def compute_rdi(df: pd.DataFrame, period: int = 10, buy_threshold: float = 0.35,
             sell_streak[i] = 0
 
     # Return DataFrame with computed values
-    return pd.DataFrame({'rdi': rdi_series, 'buy_streak': buy_streak, 'sell_streak': sell_streak})
\ No newline at end of file
+    return pd.DataFrame({'rdi': rdi_series, 'buy_streak': buy_streak, 'sell_streak': sell_streak})
+
+
+def _run_lengths(mask: np.ndarray) -> np.ndarray:
+    """Consecutive True count along the last axis, resetting to 0 on False."""
+    counts = np.cumsum(mask, axis=-1)
+    resets = np.maximum.accumulate(np.where(mask, 0, counts), axis=-1)
+    return counts - resets
+
+
+def compute_rdi_batch(df: pd.DataFrame, periods, buy_thresholds=0.35, sell_thresholds=-0.3,
+                      atr_filter: str = "global", atr_window: int = None) -> dict:
+    """
+    Compute RDI and streaks for many (period, buy_threshold, sell_threshold) configurations in one pass.
+
+    Candle body, range, conviction and the ATR activity filter are computed once and shared;
+    the EMA runs once per distinct period and the streaks are vectorized across configurations.
+    Row k of every output matches `compute_rdi(df, periods[k], buy_thresholds[k], sell_thresholds[k], ...)`.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing 'open', 'high', 'low', and 'close' columns. Not modified.
+        periods (array-like of int): EMA period per configuration.
+        buy_thresholds (float or array-like, optional): Broadcast against `periods`. Defaults to 0.35.
+        sell_thresholds (float or array-like, optional): Broadcast against `periods`. Defaults to -0.3.
+        atr_filter (str, optional): ATR gate mode, see compute_rdi. Defaults to "global".
+        atr_window (int, optional): Window for the "rolling" ATR gate. Defaults to None.
+
+    Returns:
+        dict: 2-D arrays of shape (configs, bars):
+            'rdi'        : float64 RDI per configuration.
+            'buy_streak' : int64 consecutive bars with RDI > buy_threshold while ATR is active.
+            'sell_streak': int64, mirrors compute_rdi (sell streaks are currently disabled there).
+    """
+    required_columns = {"open", "high", "low", "close"}
+    if not required_columns.issubset(df.columns):
+        missing = required_columns - set(df.columns)
+        raise ValueError(f"Input DataFrame is missing required columns: {missing}")
+
+    periods, buy_thresholds, sell_thresholds = np.broadcast_arrays(
+        np.atleast_1d(periods), np.atleast_1d(buy_thresholds), np.atleast_1d(sell_thresholds)
+    )
+
+    # Shared pieces --------------------------------------------
+    body = (df["close"] - df["open"]).abs()
+    range_ = df["high"] - df["low"]
+    conviction = body / range_.replace(0, 1e-9)
+    direction = (df["close"] > df["open"]).astype(int) * 2 - 1
+    directional_conviction = direction * conviction
+
+    atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=14).average_true_range()
+    is_active = (atr > _atr_threshold(atr, atr_filter, atr_window)).to_numpy()
+
+    # One EMA per distinct period ------------------------------
+    unique_periods, inverse = np.unique(periods, return_inverse=True)
+    emas = np.vstack([
+        directional_conviction.ewm(span=int(p), adjust=False).mean().to_numpy() for p in unique_periods
+    ])
+    rdi = emas[inverse]
+
+    # Streaks for all configurations at once -------------------
+    buy_streak = _run_lengths((rdi > buy_thresholds[:, None]) & is_active)
+    sell_streak = np.zeros_like(buy_streak)
+
+    return {"rdi": rdi, "buy_streak": buy_streak, "sell_streak": sell_streak}
+
+
+def update_rdi(prev_rdi, candle, period: int = 10) -> float:
+    """
+    Advance the RDI by one finalized candle in O(1).
+
+    Matches the last value of `compute_rdi(...)['rdi']` (EMA with adjust=False),
+    so live consumers do not need to recompute the full history, provided
+    `prev_rdi` was seeded from that history (see kraken_ws_data.stored_rdi)
+    rather than started at None mid-stream.
+
+    Args:
+        prev_rdi (float | None): RDI after the previous candle, or None for the first one.
+        candle (dict): Mapping with 'open', 'high', 'low' and 'close'.
+        period (int, optional): The period for the EMA calculation. Defaults to 10.
+    """
+    range_ = candle["high"] - candle["low"]
+    conviction = abs(candle["close"] - candle["open"]) / (range_ if range_ != 0 else 1e-9)
+    direction = 1 if candle["close"] > candle["open"] else -1
+    value = direction * conviction
+
+    if prev_rdi is None or np.isnan(prev_rdi):
+        return value
+    alpha = 2 / (period + 1)
+    return prev_rdi + alpha * (value - prev_rdi)
@@ -3,10 +3,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 from plotly.subplots import make_subplots
 import plotly.graph_objs as go
+from DYNAMICS.dynamic_params import LEAN_MEMORY
+from CUSTOMTA.indicator_registry import compute_indicators
 
-def compute_sma(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
-    sma_period = 73
-    ewa_period = 150
+SMA_OUTPUTS = ("SMA", "SMA2", "EWA", "Signal", "Position", "Market_Return", "Strategy_Return",
+               "Cumulative_Market", "Cumulative_Strategy")
+
+def compute_sma(df: pd.DataFrame, period: int = 20, sma_period: int = 73, ewa_period: int = 150,
+                lean: bool = LEAN_MEMORY, columns=SMA_OUTPUTS) -> pd.DataFrame:
     """
     Compute the Simple Moving Average (SMA) and generate trading signals for a given DataFrame.
 
@@ -14,11 +18,21 @@ def compute_sma(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
       df : pd.DataFrame
           DataFrame containing at least the 'Close' price column.
       period : int, optional
-          Window period to compute the moving average, default is 20.
+          Number of leading bars without a signal, default is 20.
+      sma_period : int, optional
+          Window for the rolling median ('SMA') and rolling mean ('SMA2'), default is 73.
+      ewa_period : int, optional
+          Span of the exponential average ('EWA'), default is 150.
+      lean : bool, optional
+          Leave `df` untouched and return a new frame holding only `columns`, with float32
+          values and int8 'Signal' / 'Position', default is LEAN_MEMORY. An int8 column cannot
+          hold NaN, so the first 'Position' is 0 where the default path leaves NaN.
+      columns : iterable of str, optional
+          Outputs to return in lean mode, default is all of SMA_OUTPUTS.
 
     Returns:
       pd.DataFrame
-          DataFrame with added columns:
+          DataFrame with added columns (only the requested ones in lean mode):
               - 'SMA': The computed moving average.
               - 'Signal': Trading signal (1 for buy, -1 for sell) based on the price crossing above/below the SMA.
               - 'Position': Difference in signals indicating trade entries/exits.
@@ -27,6 +41,11 @@ def compute_sma(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
               - 'Cumulative_Market': Cumulative return of the underlying asset.
               - 'Cumulative_Strategy': Cumulative return of the SMA strategy.
     """
+    if lean:
+        # One thread: per-thread malloc arenas would give back more than the narrow dtypes save
+        return compute_indicators(df, columns, max_workers=1, lean=True, signal_warmup=period,
+                                  sma_period=sma_period, ewa_period=ewa_period)
+
     # Compute the SMA over the specified period
     df.loc[:, 'SMA'] = df['close'].rolling(window=sma_period).median()
 
@@ -65,3 +84,82 @@ def compute_sma(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
 
 
     return df
+
+
+def _nan_cumprod(growth: np.ndarray) -> np.ndarray:
+    # Same as pandas cumprod: NaNs are skipped but stay NaN in the output
+    out = np.nancumprod(growth, axis=-1)
+    out[np.isnan(growth)] = np.nan
+    return out
+
+
+def compute_sma_batch(df: pd.DataFrame, sma_periods, ewa_periods=150, period: int = 20) -> dict:
+    """
+    Compute the compute_sma outputs for many (sma_period, ewa_period) configurations in one pass.
+
+    Market returns are computed once, every rolling mean comes from one shared cumulative sum,
+    and the rolling median / EWA run once per distinct period. Row k of every 2-D output matches
+    `compute_sma(df, period, sma_periods[k], ewa_periods[k])`.
+
+    Parameters:
+      df : pd.DataFrame
+          DataFrame containing at least the 'close' column. Not modified.
+      sma_periods : array-like of int
+          Rolling window per configuration.
+      ewa_periods : int or array-like of int, optional
+          EWA span, broadcast against `sma_periods`, default is 150.
+      period : int, optional
+          Number of leading bars without a signal, default is 20.
+
+    Returns:
+      dict
+          2-D arrays of shape (configs, bars): 'SMA', 'SMA2', 'EWA', 'Signal', 'Position',
+          'Strategy_Return', 'Cumulative_Strategy'; 1-D arrays shared by all configurations:
+          'Market_Return', 'Cumulative_Market'.
+    """
+    sma_periods, ewa_periods = np.broadcast_arrays(np.atleast_1d(sma_periods), np.atleast_1d(ewa_periods))
+    close = df['close']
+    close_np = close.to_numpy(dtype=np.float64)
+    n = len(close_np)
+
+    # Shared across every configuration
+    market_return = close.pct_change().to_numpy()
+    cumulative_market = _nan_cumprod(1 + market_return)
+    # NaN-aware: a window's mean is NaN only while it holds a NaN close, as with rolling().mean()
+    csum = np.concatenate(([0.0], np.nancumsum(close_np)))
+    ccount = np.concatenate(([0], np.cumsum(~np.isnan(close_np))))
+
+    # Rolling median and mean, once per distinct window
+    windows, window_idx = np.unique(sma_periods, return_inverse=True)
+    medians = np.vstack([close.rolling(window=int(w)).median().to_numpy() for w in windows])
+    means = np.full((len(windows), n), np.nan)
+    for j, w in enumerate(windows):
+        w = int(w)
+        full = ccount[w:] - ccount[:-w] == w
+        means[j, w - 1:] = np.where(full, (csum[w:] - csum[:-w]) / w, np.nan)
+
+    spans, span_idx = np.unique(ewa_periods, return_inverse=True)
+    ewas = np.vstack([close.ewm(span=int(sp), adjust=False).mean().to_numpy() for sp in spans])
+
+    sma = medians[window_idx]
+    signal = np.zeros(sma.shape, dtype=np.int64)
+    signal[:, period:] = np.where(close_np[period:] > sma[:, period:], 1, -1)
+
+    position = np.full(signal.shape, np.nan)
+    position[:, 1:] = np.diff(signal, axis=-1)
+
+    prev_signal = np.full(signal.shape, np.nan)
+    prev_signal[:, 1:] = signal[:, :-1]
+    strategy_return = market_return * prev_signal
+
+    return {
+        'SMA': sma,
+        'SMA2': means[window_idx],
+        'EWA': ewas[span_idx],
+        'Signal': signal,
+        'Position': position,
+        'Market_Return': market_return,
+        'Strategy_Return': strategy_return,
+        'Cumulative_Market': cumulative_market,
+        'Cumulative_Strategy': _nan_cumprod(1 + strategy_return),
+    }
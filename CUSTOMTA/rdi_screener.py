@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from CUSTOMTA.indicator_registry import compute_indicators
+from CUSTOMTA.rolling_quantile import RollingQuantile
+from DYNAMICS.dynamic_params import SCREENER_ENTRY_THRESHOLD, SCREENER_ATR_WINDOW
+
+
+class RDIScreener:
+    """
+    Incremental RDI / buy_streak state for many pairs, one row per pair.
+
+    The EMA, ATR recursion and streak are NumPy arrays over pairs, so one
+    `update` call advances all pairs that closed a bar in a single vectorized
+    step. The ATR percentile gate is one RollingQuantile per pair, O(log
+    window) per bar instead of re-sorting the whole window. Pair k follows
+    `compute_rdi(history_k, period, buy_threshold, atr_filter="rolling",
+    atr_window=atr_window)` exactly; the causal rolling gate replaces the
+    look-ahead "global" percentile, which a live screener cannot compute.
+    """
+
+    def __init__(self, symbols, period: int = 10, buy_threshold: float = 0.35,
+                 entry_threshold: int = SCREENER_ENTRY_THRESHOLD, atr_length: int = 14,
+                 atr_window: int = SCREENER_ATR_WINDOW):
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.buy_threshold = buy_threshold
+        self.entry_threshold = entry_threshold
+        self.atr_length = atr_length
+        self.atr_window = atr_window
+        self.q = 0.6  # the 60th percentile gate of compute_rdi
+
+        self.bars = np.zeros(n, dtype=np.int64)
+        self.rdi = np.full(n, np.nan)
+        self.prev_close = np.full(n, np.nan)
+        self.tr_sum = np.zeros(n)
+        self.atr = np.zeros(n)
+        self.atr_quantiles = [RollingQuantile(self.q, atr_window) for _ in range(n)]
+        self.atr_threshold = np.full(n, np.nan)
+        self.buy_streak = np.zeros(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def update(self, open_, high, low, close, mask=None) -> np.ndarray:
+        """
+        Advance every pair in `mask` (all if None) by one closed bar.
+
+        Price arguments are arrays over all pairs; entries outside `mask` are
+        ignored. Returns the indices of updated pairs whose buy_streak reached
+        entry_threshold, best first.
+        """
+        idx = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if not len(idx):
+            return idx
+        o, h, l, c = (np.asarray(a, dtype=np.float64)[idx] for a in (open_, high, low, close))
+        k = self.bars[idx]
+
+        # RDI: EMA of direction * conviction
+        bar_range = h - l
+        conviction = np.abs(c - o) / np.where(bar_range == 0, 1e-9, bar_range)
+        dc = np.where(c > o, 1.0, -1.0) * conviction
+        prev_rdi = self.rdi[idx]
+        rdi = np.where(k == 0, dc, prev_rdi + self.alpha * (dc - prev_rdi))
+
+        # ATR: Wilder recursion seeded with the mean of the first atr_length true ranges
+        prev_close = self.prev_close[idx]
+        tr = np.fmax(bar_range, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+        L = self.atr_length
+        tr_sum = self.tr_sum[idx] + tr
+        atr = np.where(k < L - 1, 0.0,
+                       np.where(k == L - 1, tr_sum / L, (self.atr[idx] * (L - 1) + tr) / L))
+
+        # Causal ATR percentile over each pair's last atr_window bars
+        quantiles = self.atr_quantiles
+        threshold = np.array([quantiles[i].update(a) for i, a in zip(idx.tolist(), atr.tolist())])
+
+        streak = np.where((rdi > self.buy_threshold) & (atr > threshold), self.buy_streak[idx] + 1, 0)
+
+        self.rdi[idx] = rdi
+        self.prev_close[idx] = c
+        self.tr_sum[idx] = tr_sum
+        self.atr[idx] = atr
+        self.atr_threshold[idx] = threshold
+        self.buy_streak[idx] = streak
+        self.bars[idx] = k + 1
+
+        hits = idx[streak >= self.entry_threshold]
+        order = np.lexsort((-self.rdi[hits], -self.buy_streak[hits]))
+        return hits[order]
+
+    def hits(self, indices) -> list:
+        """Ranked hits as dicts, ready to publish."""
+        return [{"symbol": self.symbols[i], "buy_streak": int(self.buy_streak[i]),
+                 "rdi": float(self.rdi[i]), "atr": float(self.atr[i])} for i in indices]
+
+    def warm_up(self, histories: dict):
+        """
+        Load state from {symbol: OHLC DataFrame} histories.
+
+        Each pair's full history is run through the indicator graph in bulk
+        and only the last values (plus the last atr_window ATRs) are kept, so
+        this is equivalent to replaying every bar through `update`.
+        """
+        for symbol, df in histories.items():
+            i = self.index.get(symbol)
+            if i is None or not len(df):
+                continue
+            ind = compute_indicators(df, ["rdi", "true_range", "ATR", "buy_streak"],
+                                     period=self.period, buy_threshold=self.buy_threshold,
+                                     atr_length=self.atr_length, atr_filter="rolling", atr_window=self.atr_window)
+            m = len(df)
+            atr = ind["ATR"].to_numpy()
+            self.bars[i] = m
+            self.rdi[i] = ind["rdi"].iloc[-1]
+            self.prev_close[i] = df["close"].iloc[-1]
+            self.tr_sum[i] = ind["true_range"].iloc[:self.atr_length].sum()
+            self.atr[i] = atr[-1]
+            self.buy_streak[i] = ind["buy_streak"].iloc[-1]
+            quantile = RollingQuantile(self.q, self.atr_window)
+            for a in atr[-self.atr_window:].tolist():
+                quantile.update(a)
+            self.atr_quantiles[i] = quantile
+            self.atr_threshold[i] = quantile.value
+
+    def snapshot(self) -> pd.DataFrame:
+        return pd.DataFrame({"symbol": self.symbols, "bars": self.bars, "rdi": self.rdi, "atr": self.atr,
+                             "atr_threshold": self.atr_threshold, "buy_streak": self.buy_streak})
+
+
+if __name__ == "__main__":
+    # Cost of one bar close across 500 pairs, after a full ATR window of history
+    import time
+
+    N_PAIRS = 500
+    rng = np.random.default_rng(5)
+    screener = RDIScreener([f"PAIR{i}/USD" for i in range(N_PAIRS)])
+
+    def bar(prev_close):
+        o = prev_close
+        c = o * (1 + rng.normal(0, 2e-3, N_PAIRS))
+        h = np.maximum(o, c) * (1 + rng.random(N_PAIRS) * 1e-3)
+        l = np.minimum(o, c) * (1 - rng.random(N_PAIRS) * 1e-3)
+        return o, h, l, c
+
+    close = np.full(N_PAIRS, 100.0)
+    history = []
+    for _ in range(SCREENER_ATR_WINDOW):
+        o, h, l, close = bar(close)
+        history.append((o, h, l, close))
+    o, h, l, c = (np.array(col) for col in zip(*history))
+    frames = {s: pd.DataFrame({"open": o[:, i], "high": h[:, i], "low": l[:, i], "close": c[:, i]})
+              for i, s in enumerate(screener.symbols)}
+    t0 = time.perf_counter()
+    screener.warm_up(frames)
+    warm = time.perf_counter() - t0
+
+    timings = []
+    for _ in range(200):
+        o, h, l, close = bar(close)
+        t0 = time.perf_counter()
+        hits = screener.update(o, h, l, close)
+        timings.append(time.perf_counter() - t0)
+    timings = np.array(timings) * 1e3
+    print(f"warm-up: {SCREENER_ATR_WINDOW} bars x {N_PAIRS} pairs in {warm:.1f}s")
+    print(f"bar close, {N_PAIRS} pairs: median {np.median(timings):.1f} ms, p99 {np.percentile(timings, 99):.1f} ms, "
+          f"{len(hits)} hits on the last bar")
@@ -0,0 +1,70 @@
+import os
+import time
+from threading import Lock
+
+from DYNAMICS.dynamic_params import PARQUET_PATH, STORE_PATH
+from MNDB.candle_store import store_version
+
+
+def data_version(store_path=STORE_PATH, parquet_path=PARQUET_PATH):
+    """
+    Cheap fingerprint of the candle data the dashboard reads.
+
+    Changes whenever the collector finalizes a candle (store row count / last
+    timestamp) or rewrites the file, without reading any candles.
+    """
+    try:
+        if os.path.exists(store_path):
+            return ("store",) + store_version(store_path)
+        st = os.stat(parquet_path)
+        return ("parquet", st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class FigureCache:
+    """
+    Process-wide cache of built figures, shared by every browser session.
+
+    Holds one entry keyed by the data version. Concurrent callbacks for a new
+    version wait for a single build instead of each building their own.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.key = None
+        self.value = None
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self.built_at = None
+
+    def get(self, key, build):
+        with self.lock:
+            if key is not None and key == self.key:
+                self.hits += 1
+                return self.value
+
+            self.misses += 1
+            t0 = time.perf_counter()
+            value = build()
+            self.build_seconds += time.perf_counter() - t0
+            self.key, self.value, self.built_at = key, value, time.time()
+            return value
+
+    def invalidate(self):
+        with self.lock:
+            self.key = None
+            self.value = None
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "avg_build_seconds": self.build_seconds / self.misses if self.misses else None,
+                "built_at": self.built_at,
+                "key": repr(self.key),
+            }
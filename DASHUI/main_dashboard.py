@@ -8,12 +8,14 @@ import plotly.graph_objs as go
 #from plotly.subplots import make_subplots
 
 
-from DYNAMICS.dynamic_params import PARQUET_PATH
+from DYNAMICS.dynamic_params import PARQUET_PATH, STORE_PATH, DASH_LOOKBACK_MINUTES
+from MNDB.candle_store import load_candles
+from MNDB.live_ring import LiveCandleRing
 
 from DASHUI.sub_dashboard import sub_plot
+from DASHUI.figure_cache import FigureCache, data_version
 
-from CUSTOMTA.main_rdi import compute_rdi
-from CUSTOMTA.main_sma import compute_sma
+from CUSTOMTA.indicator_registry import compute_indicators
 
 
 #from backtest.rdi_backtest_skeleton import rdi_candles  # Function to build RDI chart
@@ -28,19 +30,96 @@ from CUSTOMTA.main_sma import compute_sma
 # ------------------------------
 # Safely Load Data
 # ------------------------------
-def load_data() -> pd.DataFrame:
+def load_data(start=None, end=None, columns=None) -> pd.DataFrame:
     """
-    Load historical data from a Parquet file defined by PARQUET_PATH.
+    Load historical data from the candle store at STORE_PATH (memory-mapped),
+    falling back to the Parquet file defined by PARQUET_PATH.
+    Only rows with start <= timestamp < end and the requested columns are read.
     Returns an empty DataFrame with expected columns if there is an error.
     """
     try:
-        df = pd.read_parquet(PARQUET_PATH)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        return load_candles(STORE_PATH, PARQUET_PATH, start, end, columns)
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
 
+# ------------------------------
+# Live Candle Ring (shared memory)
+# ------------------------------
+_live_ring = None
+
+def load_live_candle():
+    """
+    Return the newest finalized candle published by the collector through shared memory,
+    or None when no collector is running.
+    """
+    global _live_ring
+    try:
+        if _live_ring is not None and not _live_ring.live:
+            # The collector closed or died; a restarted one publishes to a new segment
+            _live_ring.close()
+            _live_ring = None
+        if _live_ring is None:
+            _live_ring = LiveCandleRing.attach()
+        return _live_ring.latest()
+    except (FileNotFoundError, ValueError):
+        _live_ring = None
+        return None
+
+# ------------------------------
+# Shared Figure Cache
+# ------------------------------
+figure_cache = FigureCache()
+
+def build_figures():
+    """
+    Load the data, compute indicators and build both charts.
+
+    Returns (clean_fig, sub_fig, has_data) with figures as plain dicts so the
+    cached copy is serialized once rather than revalidated per session.
+    """
+    # Load the data (only the recent window when DASH_LOOKBACK_MINUTES is set)
+    start = None
+    if DASH_LOOKBACK_MINUTES:
+        start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(minutes=DASH_LOOKBACK_MINUTES)
+    df = load_data(start=start)
+    if df.empty:
+        empty_fig = go.Figure().to_plotly_json()
+        return empty_fig, empty_fig, False
+
+    # ------------------------------
+    # Build the Candlestick ("clean-chart")
+    # ------------------------------
+    clean_fig = go.Figure(
+        data=[
+            go.Candlestick(
+                x=df["timestamp"],
+                open=df["open"],
+                high=df["high"],
+                low=df["low"],
+                close=df["close"],
+                name="Candles"
+            ),
+        ]
+    )
+    clean_fig.update_layout(template="plotly_dark", xaxis_rangeslider_visible=False, height=700)
+
+    # ------------------------------
+    # Compute RDI, its streaks and the SMA lines in one pass over the indicator graph
+    # ------------------------------
+    indicators = compute_indicators(df, ["rdi", "buy_streak", "sell_streak", "SMA", "EWA", "SMA2"])
+    df = pd.concat([df, indicators], axis=1)
+
+    # ------------------------------
+    # Build the RDI/SMA subplots ("populated-chart")
+    # ------------------------------
+    sub_fig, rdi_fig, sma_rdi, last_update_text = sub_plot(df)
+
+    # ------------------------------
+    # Return figures
+    # ------------------------------
+    return clean_fig.to_plotly_json(), sub_fig.to_plotly_json(), True
+
 # ------------------------------
 # Build the Dash App
 # ------------------------------
@@ -56,7 +135,9 @@ def build_dash_app() -> Dash:
             html.Div(dcc.Graph(id="clean-chart"), style={"padding": "10px"}),   # Clean Candlestick
             html.Div(dcc.Graph(id="populated-chart"), style={"padding": "10px", "marginTop": "5px"}),  # Populated chart
             dcc.Interval(id="interval-chart", interval=60 * 1000, n_intervals=1),
-            html.Div(id="last-update", style={"textAlign": "center", "color": "gray", "marginTop": "10px"})
+            html.Div(id="last-update", style={"textAlign": "center", "color": "gray", "marginTop": "10px"}),
+            dcc.Interval(id="interval-live", interval=1000, n_intervals=0),  # Poll shared memory every second
+            html.Div(id="live-bar", style={"textAlign": "center", "color": "lime", "marginTop": "5px"})
         ],
         style={
             "backgroundColor": "#121212",
@@ -76,94 +157,32 @@ def build_dash_app() -> Dash:
         [Input("interval", "n_intervals")]
     )
     def update_graph(n: int):
-        # Load the data
-        df = load_data()
-        if df.empty:
-            empty_fig = go.Figure()
-            return empty_fig, empty_fig, "No data available"
-        
-        # ------------------------------
-        # Build the Candlestick ("clean-chart")
-        # ------------------------------
-
-        clean_fig = go.Figure(
-            data=[
-                go.Candlestick(
-                    x=df["timestamp"],
-                    open=df["open"],
-                    high=df["high"],
-                    low=df["low"],
-                    close=df["close"],
-                    name="Candles"
-                ),
-            ]
-        )
-        clean_fig.update_layout(template="plotly_dark", xaxis_rangeslider_visible=False, height=700)
-        # -----------------------------------------------------------------------------------------------------
-
-    
-        # ------------------------------
-        # Compute RDI and its streaks
-        # ------------------------------
-        rdi_result = compute_rdi(df)
-        df["rdi"] = rdi_result["rdi"]
-        df["buy_streak"] = rdi_result["buy_streak"]
-        df["sell_streak"] = rdi_result["sell_streak"]
-
-
-        # ---------------------------------
-        # Compute SMA 
-        # ---------------------------------
-        sma_results = compute_sma(df)
-        df["SMA"] = sma_results["SMA"]
-        df["EWA"] = sma_results["EWA"]
-        df["SMA2"] = sma_results["SMA2"]
-        # ---------------------------------------------------
-
-
-        sub_fig,  rdi_fig, sma_rdi, last_update_text = sub_plot(df)
-
-
-
-        # ------------------------------
-        # Compute RDI and its streaks
-        # ------------------------------
-        #rdi_result = compute_rdi(df)
-        #df["rdi"] = rdi_result["rdi"]
-        #df["buy_streak"] = rdi_result["buy_streak"]
-        #df["sell_streak"] = rdi_result["sell_streak"]
-
-        # ------------------------------
-        # Compute SMA, trading signals, and returns
-        # ------------------------------
-        #df = compute_sma(df, period=20)
-
-
-        # ------------------------------
-        # Build the RDI Chart ("rdi-chart")
-        # ------------------------------
-        # Generate the RDI chart using the custom function,
-        # then overlay the SMA line on it as well.
-
-        #rdi_fig, sma_fig, _ = sub_plot(df)
-        #sma_fig, _ = sma_plot(df)
-        #sma_fig, _ = rdi_candles(df)
-        #sma_fig.add_trace(
-         #   go.Scatter(
-          #      x=df["timestamp"],
-           #     y=df["SMA"],
-            #    mode="lines",
-             #   name="SMA",
-              #  line=dict(color="blue")
-            #)
-        #)
-        #rdi_fig.update_layout(template="plotly_dark", height=700)
-
-        # ------------------------------
-        # Return figures and last update text
-        # ------------------------------
+        # Every session shares one build per data version
+        clean_fig, sub_fig, has_data = figure_cache.get(data_version(), build_figures)
+        if not has_data:
+            return clean_fig, sub_fig, "No data available"
+
         update_text = f"Last updated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        return clean_fig, sub_fig, update_text 
+        return clean_fig, sub_fig, update_text
+
+    @app.server.route("/cache-stats")
+    def cache_stats():
+        return figure_cache.stats()
+
+    # ------------------------------
+    # Live Bar Callback (no disk access)
+    # ------------------------------
+    @app.callback(
+        Output("live-bar", "children"),
+        [Input("interval-live", "n_intervals")]
+    )
+    def update_live_bar(n: int):
+        candle = load_live_candle()
+        if candle is None:
+            return "Live feed not connected"
+        return (f"Latest bar {candle['timestamp'].strftime('%Y-%m-%d %H:%M')} — "
+                f"O:{candle['open']:.2f} H:{candle['high']:.2f} L:{candle['low']:.2f} "
+                f"C:{candle['close']:.2f} V:{candle['volume']:.2f} RDI:{candle['rdi']:.3f}")
 
     return app
 
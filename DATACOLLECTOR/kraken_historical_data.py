@@ -1,14 +1,26 @@
-import pandas as pd
 import requests
-from DYNAMICS.dynamic_params import ALL_INTERVAL, HISTORICAL_PAIR
-from datetime import datetime, timezone
+from DYNAMICS.dynamic_params import ALL_INTERVAL, HISTORICAL_PAIR, REST_MAX_CANDLES, START_AT_MINUTES
+from datetime import datetime, timedelta, timezone
+from MNDB.candle_buffer import CandleBuffer
+from MNDB.candle_validator import CandleValidator
 
-def fetch_kraken_ohlc(start_ts, end_ts):
+def fetch_validated_candles(start_ts, end_ts) -> tuple:
+    """
+    (CandleBuffer, ValidationReport, served_until) for [start_ts, end_ts) from the REST API.
+
+    These bars are exchange-finalized, so spikes are kept and flagged in the
+    report; only the structural checks drop rows. `served_until` is the end of
+    the last interval the API returned (capped at end_ts): any slot before it
+    that has no candle will not appear on a retry either.
+    """
     url = "https://api.kraken.com/0/public/OHLC"
+    step = ALL_INTERVAL * 60
     since = int(start_ts.timestamp())
-    all_candles = []
+    end = int(end_ts.timestamp())
+    served = since
+    candles = CandleBuffer()
 
-    while since < int(end_ts.timestamp()):
+    while since < end:
         try:
             response = requests.get(url, params={
                 "pair": HISTORICAL_PAIR,
@@ -22,23 +34,65 @@ def fetch_kraken_ohlc(start_ts, end_ts):
                 break
 
             ohlc = data["result"].get(HISTORICAL_PAIR, [])
-            for candle in ohlc:
-                ts = datetime.fromtimestamp(candle[0], tz=timezone.utc)
-                if ts >= end_ts:
-                    break
-                all_candles.append({
-                    "timestamp": ts.isoformat(),
-                    "open": float(candle[1]),
-                    "high": float(candle[2]),
-                    "low": float(candle[3]),
-                    "close": float(candle[4]),
-                    "volume": float(candle[6])
-                })
-
-            since = ohlc[-1][0] + ALL_INTERVAL * 60 if ohlc else since + ALL_INTERVAL * 60
+            candles.extend_rest(ohlc, end_epoch=end)
+            if ohlc:
+                served = max(served, min(ohlc[-1][0] + step, end))
+
+            since = ohlc[-1][0] + step if ohlc else since + step
 
         except Exception as e:
             print(f"❌ REST fetch fail: {e}")
             break
 
-    return pd.DataFrame(all_candles)
+    candles, report = CandleValidator(ALL_INTERVAL, flag_spikes=True).clean(candles)
+    if report.rejected or report.flags:
+        print(f"🧹 REST batch {start_ts.isoformat()} → {end_ts.isoformat()}: {report}")
+    return candles, report, datetime.fromtimestamp(served, tz=timezone.utc)
+
+
+def fetch_kraken_candles(start_ts, end_ts) -> CandleBuffer:
+    candles, _, _ = fetch_validated_candles(start_ts, end_ts)
+    return candles
+
+
+def fetch_kraken_ohlc(start_ts, end_ts):
+    return fetch_kraken_candles(start_ts, end_ts).to_frame()
+
+
+def backfill_gaps(db, start_ts, end_ts):
+    """
+    Fetch only the candle ranges missing from `db` between start_ts and end_ts.
+
+    Uses the database's gap index, so a warm database makes no REST calls at all.
+    The range is clamped to the last REST_MAX_CANDLES intervals, the most the
+    API serves, and slots the API skipped over are settled in `db` so they are
+    not requested again. Returns the number of candles written.
+    """
+    step = ALL_INTERVAL * 60
+    now = int(datetime.now(tz=timezone.utc).timestamp())
+    oldest = datetime.fromtimestamp(now - now % step - REST_MAX_CANDLES * step, tz=timezone.utc)
+    start_ts = max(start_ts, oldest)
+    ranges = db.missing_ranges(start_ts, end_ts)
+    if not ranges:
+        print("✅ No gaps found, skipping REST backfill.")
+        return 0
+
+    patched = 0
+    for gap_start, gap_end in ranges:
+        print(f"🔧 Backfilling gap {gap_start.isoformat()} → {gap_end.isoformat()}")
+        candles, report, served_until = fetch_validated_candles(gap_start, gap_end)
+        patched += db.save_many(candles)
+        db.flag_many(report.flagged_rows())
+        settled = db.settle(gap_start, served_until)
+        if settled:
+            print(f"🪦 {settled} slot(s) not served by REST, skipped from now on")
+    return patched
+
+
+def backfill_recent(db, minutes=START_AT_MINUTES):
+    """Backfill gaps in the last `minutes`, stopping before the candle still in progress."""
+    step = ALL_INTERVAL * 60
+    now = int(datetime.now(tz=timezone.utc).timestamp())
+    end = datetime.fromtimestamp(now - now % step, tz=timezone.utc)
+    start = end - timedelta(minutes=minutes)
+    return backfill_gaps(db, start, end)
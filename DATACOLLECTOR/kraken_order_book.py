@@ -0,0 +1,391 @@
+import asyncio, json, os, time, websockets, zlib
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sortedcontainers import SortedDict
+
+from DYNAMICS.dynamic_params import LIVE_PAIR, BOOK_DEPTH, BOOK_SNAPSHOT_DIR, BOOK_SNAPSHOT_SECONDS
+from DATACOLLECTOR.kraken_ws_data import KRAKEN_WS_V2_URL, TerminalColors, backoff_delay, ssl_context
+
+CHECKSUM_LEVELS = 10
+
+
+class BookChecksumError(Exception):
+    """The local book no longer matches Kraken's; it must be rebuilt from a new snapshot."""
+
+
+class OrderBook:
+    """
+    Level-2 book for one pair, kept in two SortedDicts keyed by price.
+
+    Inserts, updates and deletes are O(log n); best bid/ask are O(1) and the
+    top k levels O(log n + k). The book is truncated to `depth` levels per side
+    after every message, as Kraken requires for the checksum to line up.
+
+    The checksum formats levels with the pair's own price/qty precision; the
+    collector sets both from the `instrument` channel (see `set_precision`).
+    """
+
+    def __init__(self, symbol: str = LIVE_PAIR, depth: int = BOOK_DEPTH,
+                 price_precision: int = None, qty_precision: int = None):
+        self.symbol = symbol
+        self.depth = depth
+        self.price_precision = price_precision
+        self.qty_precision = qty_precision
+        self.bids = SortedDict()
+        self.asks = SortedDict()
+        self.timestamp = None
+        self.updates = 0
+
+    def set_precision(self, instrument_pairs) -> bool:
+        """Take price/qty precision from the `pairs` of an `instrument` message; True if this pair was listed."""
+        for pair in instrument_pairs:
+            if pair.get("symbol") == self.symbol:
+                self.price_precision = int(pair["price_precision"])
+                self.qty_precision = int(pair["qty_precision"])
+                return True
+        return False
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.timestamp = None
+
+    # ------------------------------
+    # Applying messages
+    # ------------------------------
+    @staticmethod
+    def _apply_side(side: SortedDict, levels):
+        for level in levels:
+            price = level["price"]
+            qty = level["qty"]
+            if qty == 0:
+                side.pop(price, None)
+            else:
+                side[price] = qty
+
+    def _truncate(self):
+        bids, asks, depth = self.bids, self.asks, self.depth
+        while len(bids) > depth:
+            bids.popitem(0)       # lowest bid
+        while len(asks) > depth:
+            asks.popitem(-1)      # highest ask
+
+    def apply(self, entry: dict, snapshot: bool = False, verify: bool = True):
+        """
+        Apply one entry of a v2 `book` message's `data` list.
+
+        Raises BookChecksumError if `verify` and the resulting top 10 levels do
+        not match the entry's checksum.
+        """
+        if snapshot:
+            self.clear()
+        self._apply_side(self.bids, entry.get("bids", ()))
+        self._apply_side(self.asks, entry.get("asks", ()))
+        self._truncate()
+        self.timestamp = entry.get("timestamp", self.timestamp)
+        self.updates += 1
+
+        if verify and "checksum" in entry:
+            local = self.checksum()
+            if local != entry["checksum"]:
+                raise BookChecksumError(f"{self.symbol}: checksum {local} != {entry['checksum']}")
+
+    def checksum(self) -> int:
+        """CRC32 of the top 10 asks then top 10 bids, as defined for the v2 book channel."""
+        if self.price_precision is None or self.qty_precision is None:
+            raise ValueError(f"{self.symbol}: precision unknown, set it from the instrument channel first")
+        price_fmt = f".{self.price_precision}f"
+        qty_fmt = f".{self.qty_precision}f"
+        parts = []
+        for price, qty in self.top_asks(CHECKSUM_LEVELS) + self.top_bids(CHECKSUM_LEVELS):
+            parts.append(format(price, price_fmt).replace(".", "").lstrip("0"))
+            parts.append(format(qty, qty_fmt).replace(".", "").lstrip("0"))
+        return zlib.crc32("".join(parts).encode())
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def top_bids(self, n: int) -> list:
+        """Best `n` bids, highest price first, as (price, qty)."""
+        bids = self.bids
+        return [(p, bids[p]) for p in islice(reversed(bids), n)]
+
+    def top_asks(self, n: int) -> list:
+        """Best `n` asks, lowest price first, as (price, qty)."""
+        asks = self.asks
+        return [(p, asks[p]) for p in islice(asks, n)]
+
+    def best_bid(self):
+        return self.bids.peekitem(-1) if self.bids else None
+
+    def best_ask(self):
+        return self.asks.peekitem(0) if self.asks else None
+
+    def top_of_book(self) -> dict:
+        bid, ask = self.best_bid(), self.best_ask()
+        top = {
+            "bid": bid[0] if bid else np.nan, "bid_qty": bid[1] if bid else np.nan,
+            "ask": ask[0] if ask else np.nan, "ask_qty": ask[1] if ask else np.nan,
+        }
+        top["mid"] = (top["bid"] + top["ask"]) / 2
+        top["spread"] = top["ask"] - top["bid"]
+        return top
+
+    def depth_levels(self, n: int = None) -> dict:
+        """Top `n` levels per side (all if None) as price/qty arrays, best first."""
+        n = self.depth if n is None else n
+        bids = np.array(self.top_bids(n), dtype=float).reshape(-1, 2)
+        asks = np.array(self.top_asks(n), dtype=float).reshape(-1, 2)
+        return {"bid_price": bids[:, 0], "bid_qty": bids[:, 1],
+                "ask_price": asks[:, 0], "ask_qty": asks[:, 1]}
+
+    def vwap(self, side: str, size: float) -> tuple:
+        """
+        Average price to fill `size` against the book.
+
+        side="buy" walks the asks, side="sell" walks the bids. Returns
+        (vwap, filled); filled < size when the visible book is too thin.
+        """
+        if side == "buy":
+            levels, book = iter(self.asks), self.asks
+        elif side == "sell":
+            levels, book = reversed(self.bids), self.bids
+        else:
+            raise ValueError("side must be 'buy' or 'sell'")
+
+        remaining = size
+        cost = 0.0
+        for price in levels:
+            take = min(remaining, book[price])
+            cost += take * price
+            remaining -= take
+            if remaining <= 0:
+                break
+        filled = size - max(remaining, 0.0)
+        return (cost / filled if filled else np.nan), filled
+
+    def slippage(self, side: str, size: float) -> float:
+        """Relative cost of filling `size` versus the mid price."""
+        price, filled = self.vwap(side, size)
+        mid = self.top_of_book()["mid"]
+        return (price - mid) / mid if side == "buy" else (mid - price) / mid
+
+
+class BookSnapshotter:
+    """
+    Periodically records the top `levels` of each book and writes them as
+    Parquet part files (one row per level) under `root/<symbol>/`.
+    """
+
+    def __init__(self, root: str = BOOK_SNAPSHOT_DIR, every_seconds: float = BOOK_SNAPSHOT_SECONDS,
+                 levels: int = BOOK_DEPTH, snapshots_per_file: int = 60):
+        self.root = root
+        self.every_seconds = every_seconds
+        self.levels = levels
+        self.snapshots_per_file = snapshots_per_file
+        self.last = {}
+        self.rows = {}
+        self.pending = {}
+
+    def due(self, symbol: str, now: float) -> bool:
+        return now - self.last.get(symbol, 0.0) >= self.every_seconds
+
+    def take(self, book: OrderBook, now: float = None):
+        """Record the book; returns a (symbol, table) batch when a part file is ready to write."""
+        now = time.time() if now is None else now
+        self.last[book.symbol] = now
+        ts = np.datetime64(int(now * 1e9), "ns")
+        rows = self.rows.setdefault(book.symbol, [])
+        for side, levels in (("bid", book.top_bids(self.levels)), ("ask", book.top_asks(self.levels))):
+            for i, (price, qty) in enumerate(levels):
+                rows.append((ts, side, i, price, qty))
+        self.pending[book.symbol] = self.pending.get(book.symbol, 0) + 1
+        if self.pending[book.symbol] >= self.snapshots_per_file:
+            return self.drain(book.symbol)
+        return None
+
+    def drain(self, symbol: str):
+        rows = self.rows.pop(symbol, [])
+        self.pending[symbol] = 0
+        if not rows:
+            return None
+        ts, side, level, price, qty = zip(*rows)
+        table = pa.table({
+            "timestamp": pa.array(np.array(ts, dtype="datetime64[ns]"), type=pa.timestamp("ns", tz="UTC")),
+            "side": pa.array(side, type=pa.dictionary(pa.int8(), pa.string())),
+            "level": pa.array(level, type=pa.int16()),
+            "price": pa.array(price, type=pa.float64()),
+            "qty": pa.array(qty, type=pa.float64()),
+        })
+        return symbol, table
+
+    def write(self, batch) -> str:
+        symbol, table = batch
+        folder = os.path.join(self.root, symbol.replace("/", ""))
+        os.makedirs(folder, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(folder, f"book_{stamp}.parquet")
+        tmp = f"{path}.tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+        return path
+
+    def flush(self):
+        for symbol in list(self.rows):
+            batch = self.drain(symbol)
+            if batch is not None:
+                self.write(batch)
+
+
+async def run_kraken_book_collector(symbols=(LIVE_PAIR,), depth=BOOK_DEPTH, snapshotter=None, on_update=None):
+    """
+    Subscribe to the v2 `book` channel and keep one OrderBook per symbol.
+
+    The `instrument` channel is subscribed first: its snapshot gives each
+    pair's price/qty precision, which the checksum depends on, and only then
+    is the book subscribed. `on_update(book)` is called after every verified
+    message. A checksum mismatch drops the connection so a fresh snapshot
+    rebuilds the book; every reconnect waits a jittered backoff, so a
+    persistent mismatch cannot hammer the API. Pending snapshots are written
+    when the task is cancelled.
+    """
+    books = {s: OrderBook(s, depth) for s in symbols}
+    snapshotter = snapshotter if snapshotter is not None else BookSnapshotter(levels=depth)
+    attempt = 0
+
+    async def connect():
+        nonlocal attempt
+        async with websockets.connect(KRAKEN_WS_V2_URL, ssl=ssl_context) as ws:
+            await ws.send(json.dumps({
+                "method": "subscribe",
+                "params": {
+                    "channel": "instrument",
+                    "snapshot": True
+                }
+            }))
+            book_subscribed = False
+
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("channel") == "instrument" and "data" in data:
+                    pairs = data["data"].get("pairs", [])
+                    for book in books.values():
+                        book.set_precision(pairs)
+                    if not book_subscribed and data.get("type") == "snapshot":
+                        unknown = [s for s, b in books.items() if b.price_precision is None]
+                        if unknown:
+                            raise ValueError(f"No instrument precision for {unknown}")
+                        await ws.send(json.dumps({
+                            "method": "subscribe",
+                            "params": {
+                                "channel": "book",
+                                "symbol": list(symbols),
+                                "depth": depth
+                            }
+                        }))
+                        book_subscribed = True
+                    continue
+                if data.get("channel") != "book" or "data" not in data:
+                    continue
+
+                is_snapshot = data.get("type") == "snapshot"
+                now = time.time()
+                for entry in data["data"]:
+                    book = books.get(entry.get("symbol"))
+                    if book is None:
+                        continue
+                    book.apply(entry, snapshot=is_snapshot)
+                    attempt = 0
+                    if on_update is not None:
+                        on_update(book)
+                    if snapshotter.due(book.symbol, now):
+                        batch = snapshotter.take(book, now)
+                        if batch is not None:
+                            # Parquet encoding stays off the event loop
+                            await asyncio.to_thread(snapshotter.write, batch)
+
+    try:
+        while True:
+            try:
+                await connect()
+                raise ConnectionError("connection closed")
+            except BookChecksumError as e:
+                delay = backoff_delay(attempt)
+                print(f"\n{TerminalColors.YELLOW}⚠️ {e}, resubscribing for a fresh snapshot in {delay:.1f}s...{TerminalColors.RESET}")
+                for book in books.values():
+                    book.clear()
+            except Exception as e:
+                delay = backoff_delay(attempt)
+                print(f"\n{TerminalColors.RED}⚠️ Book WS error: {e}, reconnecting in {delay:.1f}s...{TerminalColors.RESET}")
+            attempt += 1
+            await asyncio.sleep(delay)
+    finally:
+        snapshotter.flush()
+
+
+if __name__ == "__main__":
+    # Replay benchmark: decode + apply + checksum-verify synthetic v2 book messages
+    import random
+
+    N_UPDATES = 200_000
+    random.seed(11)
+    reference = OrderBook(LIVE_PAIR, BOOK_DEPTH, price_precision=1, qty_precision=8)
+    mid = 100_000.0
+
+    def level(price):
+        return {"price": round(price, 1), "qty": round(random.expovariate(2), 8)}
+
+    snapshot = {"symbol": LIVE_PAIR,
+                "bids": [level(mid - 0.5 - i) for i in range(BOOK_DEPTH)],
+                "asks": [level(mid + 0.5 + i) for i in range(BOOK_DEPTH)]}
+    reference.apply(snapshot, snapshot=True, verify=False)
+    snapshot["checksum"] = reference.checksum()
+    fixture = [json.dumps({"channel": "book", "type": "snapshot", "data": [snapshot]})]
+
+    for _ in range(N_UPDATES):
+        mid += random.gauss(0, 0.5)
+        entry = {"symbol": LIVE_PAIR, "bids": [], "asks": []}
+        for _ in range(random.randint(1, 3)):
+            side = random.choice(("bids", "asks"))
+            offset = random.randint(0, BOOK_DEPTH) + 0.5
+            price = mid - offset if side == "bids" else mid + offset
+            lvl = level(price)
+            if random.random() < 0.3:
+                lvl["qty"] = 0
+            # Keep the book uncrossed like a real feed
+            best_ask, best_bid = reference.best_ask(), reference.best_bid()
+            if side == "bids" and best_ask and lvl["price"] >= best_ask[0]:
+                continue
+            if side == "asks" and best_bid and lvl["price"] <= best_bid[0]:
+                continue
+            entry[side].append(lvl)
+        reference.apply(entry, verify=False)
+        entry["checksum"] = reference.checksum()
+        fixture.append(json.dumps({"channel": "book", "type": "update", "data": [entry]}))
+
+    book = OrderBook(LIVE_PAIR, BOOK_DEPTH, price_precision=1, qty_precision=8)
+    t0 = time.perf_counter()
+    for message in fixture:
+        data = json.loads(message)
+        is_snapshot = data["type"] == "snapshot"
+        for entry in data["data"]:
+            book.apply(entry, snapshot=is_snapshot)
+    elapsed = time.perf_counter() - t0
+    print(f"replayed {len(fixture):,} messages in {elapsed:.2f}s: {len(fixture) / elapsed:,.0f} updates/s (checksums verified)")
+
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        book.top_of_book()
+    print(f"top_of_book      : {(time.perf_counter() - t0) * 10:.2f} µs")
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        book.vwap("buy", 5.0)
+    print(f"vwap('buy', 5.0) : {(time.perf_counter() - t0) * 10:.2f} µs -> {book.vwap('buy', 5.0)}")
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        book.depth_levels(10)
+    print(f"depth_levels(10) : {(time.perf_counter() - t0) * 10:.2f} µs")
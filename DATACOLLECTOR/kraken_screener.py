@@ -0,0 +1,132 @@
+import asyncio, json, time
+
+import numpy as np
+
+from DYNAMICS.dynamic_params import ALL_INTERVAL, SCREENER_PAIRS, SCREENER_CLOSE_GRACE
+from DATACOLLECTOR.kraken_ws_data import KRAKEN_WS_V2_URL, FeedDeduplicator, TerminalColors, ws_feed
+from CUSTOMTA.rdi_screener import RDIScreener
+from MNDB.candle_buffer import Candle, iso_utc
+from MNDB.candle_validator import OK, check_candles
+
+
+class BarSlots:
+    """
+    Latest `ohlc` update per pair, plus the bar it replaced.
+
+    Keeping the previous bar means a pair whose next bar has already started
+    by the time the close timer fires still contributes its finished bar.
+    """
+
+    def __init__(self, n: int):
+        self.begin = np.full((2, n), -1, dtype=np.int64)   # [current, previous]
+        self.prices = np.zeros((2, 4, n))                   # open, high, low, close
+
+    def set(self, i: int, c: Candle):
+        if c.timestamp > self.begin[0, i]:
+            self.begin[1, i] = self.begin[0, i]
+            self.prices[1, :, i] = self.prices[0, :, i]
+        elif c.timestamp < self.begin[0, i]:
+            return
+        self.begin[0, i] = c.timestamp
+        self.prices[0, :, i] = (c.open, c.high, c.low, c.close)
+
+    def closed(self, begin: int):
+        """(prices, mask) of the bar starting at `begin` for every pair that has one."""
+        current = self.begin[0] == begin
+        previous = self.begin[1] == begin
+        prices = np.where(current, self.prices[0], self.prices[1])
+        return prices, current | previous
+
+
+async def run_rdi_screener(symbols=SCREENER_PAIRS, hits=None, screener=None, connections=1,
+                           url=KRAKEN_WS_V2_URL, grace=SCREENER_CLOSE_GRACE):
+    """
+    Screen `symbols` for RDI buy streaks at every candle close.
+
+    All pairs share one `ohlc` subscription. `grace` seconds after each
+    interval boundary, every pair that traded in the closed interval is
+    advanced in one vectorized RDIScreener step and a message
+        {"timestamp", "pairs_updated", "compute_ms", "hits": [ranked hits]}
+    is put on `hits` (an asyncio.Queue). Pass a warmed-up `screener` to
+    start from history instead of from scratch.
+    """
+    screener = screener if screener is not None else RDIScreener(symbols)
+    hits = hits if hits is not None else asyncio.Queue()
+    slots = BarSlots(len(screener))
+    dedup = FeedDeduplicator()
+    queue = asyncio.Queue()
+    step = ALL_INTERVAL * 60
+
+    subscription = {
+        "method": "subscribe",
+        "params": {
+            "channel": "ohlc",
+            "symbol": list(screener.symbols),
+            "interval": ALL_INTERVAL
+        }
+    }
+
+    def ingest(conn_id, message):
+        data = json.loads(message)
+        if data.get("channel") != "ohlc" or "data" not in data:
+            return
+        updates = [(screener.index[entry["symbol"]], Candle.from_ws(entry)) for entry in data["data"]
+                   if entry.get("symbol") in screener.index and dedup.accept(entry, conn_id)]
+        if not updates:
+            return
+        # Same sanity checks as the collector, so the screener sees the bars the DB keeps
+        checks = check_candles([c for _, c in updates], step)
+        for (i, c), reason in zip(updates, checks):
+            if reason == OK:
+                slots.set(i, c)
+
+    async def close_bars():
+        while True:
+            now = time.time()
+            boundary = (now // step + 1) * step
+            await asyncio.sleep(boundary + grace - now)
+
+            closed = int(boundary - step)
+            t0 = time.perf_counter()
+            prices, mask = slots.closed(closed)
+            ranked = screener.update(*prices, mask=mask)
+            elapsed = (time.perf_counter() - t0) * 1e3
+            await hits.put({
+                "timestamp": iso_utc(closed),
+                "pairs_updated": int(mask.sum()),
+                "compute_ms": elapsed,
+                "hits": screener.hits(ranked),
+            })
+
+    feeds = [asyncio.create_task(ws_feed(i, subscription, queue, url)) for i in range(connections)]
+    closer = asyncio.create_task(close_bars())
+    try:
+        while True:
+            conn_id, message = await queue.get()
+            try:
+                ingest(conn_id, message)
+            except Exception as e:
+                print(f"\n{TerminalColors.RED}❌ Screener parse fail: {e}{TerminalColors.RESET}")
+    finally:
+        for task in feeds + [closer]:
+            task.cancel()
+        await asyncio.gather(*feeds, closer, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    async def main():
+        hits = asyncio.Queue()
+        screener_task = asyncio.create_task(run_rdi_screener(SCREENER_PAIRS, hits))
+        try:
+            while True:
+                result = await hits.get()
+                names = ", ".join(f"{h['symbol']} ({h['buy_streak']})" for h in result["hits"]) or "none"
+                print(f"{TerminalColors.GREEN}📡 {result['timestamp']} — {result['pairs_updated']} pairs in "
+                      f"{result['compute_ms']:.1f} ms, hits: {names}{TerminalColors.RESET}")
+        finally:
+            screener_task.cancel()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("🛑 Screener stopped.")
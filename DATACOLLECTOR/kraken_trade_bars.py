@@ -0,0 +1,243 @@
+import asyncio, json, time, websockets
+from datetime import datetime, timedelta
+from DYNAMICS.dynamic_params import ALL_INTERVAL, LIVE_PAIR, TRADE_BAR_GRACE, TRADE_BARS
+from DATACOLLECTOR.kraken_ws_data import KRAKEN_WS_V2_URL, TerminalColors, ssl_context
+from MNDB.candle_buffer import CandleBuffer
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+US_PER_SECOND = 1_000_000
+
+BAR_KINDS = ("time", "volume", "dollar")
+
+
+def parse_trade_ts(ts: str) -> int:
+    """Kraken v2 trade timestamp ("2023-09-25T07:48:36.925533Z") -> epoch microseconds."""
+    return (datetime.fromisoformat(ts.rstrip("Z")) - _EPOCH) // _US
+
+
+class TradeBarAggregator:
+    """
+    Builds bars locally from individual trades.
+
+    kind="time"   -> one bar per `size` seconds (any interval, not just Kraken's)
+    kind="volume" -> a bar closes once `size` units of base volume have traded
+    kind="dollar" -> a bar closes once `size` of quote notional (price * qty) has traded
+
+    Completed bars collect in a CandleBuffer (timestamp = bar open time, in
+    whole seconds for whole-second time bars, microseconds otherwise) until
+    `flush()` writes them to a BarDatabase in one batch, keyed by kind, size
+    and a sequence number: the bucket index for time bars, a running count
+    for volume and dollar bars (two of which can open in the same µs).
+
+    Trades may arrive up to `grace` seconds out of order. The watermark
+    trails the newest trade (or the clock passed to `close_due()`) by
+    `grace`; a time bar is emitted once the watermark passes its end, and a
+    trade stamped before the watermark is late: it is dropped and counted
+    in `late` instead of reopening a bar that was already written.
+    """
+
+    def __init__(self, kind: str = "time", size: float = ALL_INTERVAL * 60, grace: float = TRADE_BAR_GRACE):
+        if kind not in BAR_KINDS:
+            raise ValueError(f"kind must be one of {BAR_KINDS}")
+        if size <= 0:
+            raise ValueError("size must be positive")
+        if grace < 0:
+            raise ValueError("grace must not be negative")
+        self.kind = kind
+        self.size = size
+        self.grace_us = int(grace * US_PER_SECOND)
+        self._bucket_us = int(size * US_PER_SECOND) if kind == "time" else None
+        self._unit = "s" if kind == "time" and float(size).is_integer() else "us"
+        self.completed = CandleBuffer(unit=self._unit)
+        self._seqs = []
+        self.next_seq = None            # volume/dollar: first free sequence number, read from the DB on flush
+        self.trades = 0
+        self.late = 0
+        self.newest = None
+        self.watermark = None
+        self.open_bars = {}             # time: bucket start -> [open, high, low, close, volume, first_ts, last_ts]
+        self._reset()
+
+    def _reset(self):
+        self.bar_ts = None
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.notional = 0.0
+
+    def _to_unit(self, ts_us: int) -> int:
+        return ts_us // US_PER_SECOND if self._unit == "s" else ts_us
+
+    def _emit(self):
+        self.completed.append(self._to_unit(self.bar_ts), self.open, self.high, self.low, self.close, self.volume)
+        self._reset()
+
+    def _advance(self, until_us: int):
+        """Move the watermark up to `until_us`, emitting every time bar that ends at or before it."""
+        if self.watermark is not None and until_us <= self.watermark:
+            return
+        self.watermark = until_us
+        if self.kind != "time":
+            return
+        due = sorted(b for b in self.open_bars if b + self._bucket_us <= until_us)
+        for bucket in due:
+            o, h, l, c, v, _, _ = self.open_bars.pop(bucket)
+            self.completed.append(self._to_unit(bucket), o, h, l, c, v)
+            self._seqs.append(bucket // self._bucket_us)
+
+    def add(self, ts_us: int, price: float, qty: float):
+        """Feed one trade. Trades older than the watermark are dropped and counted in `late`."""
+        if self.watermark is not None and ts_us < self.watermark:
+            self.late += 1
+            return
+        self.trades += 1
+
+        if self.kind == "time":
+            bucket = ts_us - ts_us % self._bucket_us
+            bar = self.open_bars.get(bucket)
+            if bar is None:
+                self.open_bars[bucket] = [price, price, price, price, qty, ts_us, ts_us]
+            else:
+                if price > bar[1]:
+                    bar[1] = price
+                elif price < bar[2]:
+                    bar[2] = price
+                if ts_us >= bar[6]:
+                    bar[3] = price
+                    bar[6] = ts_us
+                elif ts_us < bar[5]:
+                    bar[0] = price
+                    bar[5] = ts_us
+                bar[4] += qty
+        else:
+            if self.bar_ts is None:
+                self.bar_ts = ts_us
+                self.open = self.high = self.low = price
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += qty
+            self.notional += price * qty
+
+            if self.kind == "volume" and self.volume >= self.size:
+                self._emit()
+            elif self.kind == "dollar" and self.notional >= self.size:
+                self._emit()
+
+        if self.newest is None or ts_us > self.newest:
+            self.newest = ts_us
+            self._advance(ts_us - self.grace_us)
+
+    def add_many(self, trades):
+        """Feed an iterable of (ts_us, price, qty) tuples."""
+        add = self.add
+        for ts_us, price, qty in trades:
+            add(ts_us, price, qty)
+
+    def add_message(self, data: dict):
+        """Feed the trades from one decoded Kraken v2 `trade` channel message."""
+        add = self.add
+        for t in data["data"]:
+            add(parse_trade_ts(t["timestamp"]), float(t["price"]), float(t["qty"]))
+
+    def close_due(self, now_us: int):
+        """Advance the watermark by the clock, finalizing time bars whose interval ended `grace` ago."""
+        self._advance(now_us - self.grace_us)
+
+    def pending(self) -> int:
+        return len(self.completed)
+
+    def flush(self, bar_db) -> int:
+        """Write completed bars to a BarDatabase in one transaction and start a new batch."""
+        batch, self.completed = self.completed, CandleBuffer(unit=self._unit)
+        seqs, self._seqs = self._seqs, []
+        if not len(batch):
+            return 0
+        if self.kind != "time":
+            if self.next_seq is None:
+                self.next_seq = bar_db.next_seq(self.kind, self.size)
+            seqs = range(self.next_seq, self.next_seq + len(batch))
+            self.next_seq += len(batch)
+        return bar_db.save_bars(self.kind, self.size, batch, seqs)
+
+
+async def run_kraken_trade_collector(bar_db, bars=TRADE_BARS, flush_every=1.0):
+    """
+    Subscribe to the v2 `trade` channel for LIVE_PAIR and write locally built bars to `bar_db`.
+
+    `bars` is a list of (kind, size) pairs; every trade feeds one aggregator
+    per pair over the same connection. Completed bars are flushed at most
+    every `flush_every` seconds.
+    """
+    aggregators = [TradeBarAggregator(kind, size) for kind, size in bars]
+
+    async def connect():
+        async with websockets.connect(KRAKEN_WS_V2_URL, ssl=ssl_context) as ws:
+            await ws.send(json.dumps({
+                "method": "subscribe",
+                "params": {
+                    "channel": "trade",
+                    "symbol": [LIVE_PAIR],
+                    "snapshot": False
+                }
+            }))
+
+            last_flush = time.monotonic()
+            async for message in ws:
+                try:
+                    data = json.loads(message)
+                    if data.get("channel") == "trade" and "data" in data:
+                        for aggregator in aggregators:
+                            aggregator.add_message(data)
+
+                    now = time.monotonic()
+                    if now - last_flush >= flush_every:
+                        now_us = int(time.time() * US_PER_SECOND)
+                        for aggregator in aggregators:
+                            aggregator.close_due(now_us)
+                            written = await asyncio.to_thread(aggregator.flush, bar_db)
+                            if written:
+                                print(f"\n{TerminalColors.GREEN}📡 {written} {aggregator.kind} bar(s) of {aggregator.size:g} finalized from {aggregator.trades} trades ({aggregator.late} late){TerminalColors.RESET}")
+                        last_flush = now
+
+                except Exception as e:
+                    print(f"\n{TerminalColors.RED}❌ Parse fail: {e}{TerminalColors.RESET}")
+
+    while True:
+        try:
+            await connect()
+        except Exception as e:
+            print(f"\n{TerminalColors.RED}⚠️ Trade WS error: {e}, reconnecting in 5s...{TerminalColors.RESET}")
+            await asyncio.sleep(5)
+
+
+if __name__ == "__main__":
+    # Replay benchmark: decode + aggregate synthetic v2 trade messages
+    import random
+
+    N_TRADES = 1_000_000
+    PER_MESSAGE = 10
+    random.seed(3)
+    t_us = 1_750_000_000 * US_PER_SECOND
+    price = 100_000.0
+    fixture = []
+    for _ in range(N_TRADES // PER_MESSAGE):
+        trades = []
+        for _ in range(PER_MESSAGE):
+            t_us += random.randint(1, 20_000)
+            price *= 1 + random.gauss(0, 1e-4)
+            ts = (_EPOCH + timedelta(microseconds=t_us)).isoformat() + "Z"
+            trades.append({"symbol": LIVE_PAIR, "side": "buy", "price": round(price, 1),
+                           "qty": round(random.expovariate(20), 8), "ord_type": "market",
+                           "trade_id": 0, "timestamp": ts})
+        fixture.append(json.dumps({"channel": "trade", "type": "update", "data": trades}))
+
+    for kind, size in [("time", 60), ("volume", 5.0), ("dollar", 500_000.0)]:
+        aggregator = TradeBarAggregator(kind, size)
+        t0 = time.perf_counter()
+        for message in fixture:
+            aggregator.add_message(json.loads(message))
+        elapsed = time.perf_counter() - t0
+        print(f"{kind:<6} bars: {N_TRADES / elapsed:>12,.0f} trades/s  ({aggregator.pending()} bars)")
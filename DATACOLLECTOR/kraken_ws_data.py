@@ -1,6 +1,13 @@
-import asyncio, json, websockets, ssl
-from datetime import datetime
-from DYNAMICS.dynamic_params import ALL_INTERVAL, LIVE_PAIR, PARQUET_PATH
+import asyncio, json, random, time, websockets, ssl
+from collections import Counter, deque
+from DYNAMICS.dynamic_params import (ALL_INTERVAL, LIVE_PAIR, PARQUET_PATH, RING_SIZE,
+                                     WS_CONNECTIONS, WS_BACKOFF_BASE, WS_BACKOFF_MAX)
+from DATACOLLECTOR.kraken_historical_data import backfill_recent
+from MNDB.candle_store import CandleStore
+from CUSTOMTA.main_rdi import update_rdi
+from CUSTOMTA.indicator_registry import compute_indicators
+from MNDB.candle_buffer import Candle
+from MNDB.candle_validator import OK, CandleValidator, check_candles
 
 ssl_context = ssl._create_unverified_context()
 KRAKEN_WS_V2_URL = "wss://ws.kraken.com/v2"
@@ -17,88 +24,315 @@ class TerminalColors:
 
 spinner_frames = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
 
-async def run_kraken_collector(db):
+class FeedDeduplicator:
+    """
+    First-arrival filter for `ohlc` updates coming in over redundant connections.
+
+    Each symbol's updates advance through versions (interval_begin, update
+    timestamp, trade count). A copy is accepted only if it is newer than
+    anything already accepted for that symbol, so whichever connection
+    delivers an update first wins and the later copies, including the
+    snapshot sent on every (re)subscribe, are dropped.
+    """
+
+    def __init__(self):
+        self.latest = {}
+        self.accepted = 0
+        self.dropped = 0
+        self.wins = Counter()
+
+    def accept(self, entry: dict, source=None) -> bool:
+        version = (entry["interval_begin"], entry.get("timestamp", ""), entry.get("trades", 0))
+        symbol = entry.get("symbol")
+        last = self.latest.get(symbol)
+        if last is not None and version <= last:
+            self.dropped += 1
+            return False
+        self.latest[symbol] = version
+        self.accepted += 1
+        self.wins[source] += 1
+        return True
+
+
+def stored_rdi(db):
+    """
+    (rdi, epoch seconds) after the newest stored candle, or (None, None) for an empty DB.
+
+    Uses the indicator graph's 'rdi' node, the same EMA as compute_rdi's
+    'rdi' column, which also works on histories shorter than the ATR window.
+    Seeding update_rdi with it keeps the live value equal to compute_rdi
+    over the stored history instead of restarting the EMA with the process.
+    """
+    history = db.to_frame()
+    if history.empty:
+        return None, None
+    rdi = compute_indicators(history, ["rdi"])["rdi"].iloc[-1]
+    return float(rdi), int(history["timestamp"].iloc[-1].timestamp())
+
+
+class LiveRdi:
+    """
+    update_rdi over the finalized candle stream, tolerant of corrections.
+
+    Keeps (timestamp, rdi before it, candle) for the last `keep` candles, so a
+    finalized candle that replaces (or lands between) recent ones is absorbed
+    by replaying from that point in O(keep) instead of reloading the DB.
+    """
+
+    def __init__(self, rdi=None, ts=None, keep=RING_SIZE):
+        self.recent = deque(maxlen=keep)
+        self.reset(rdi, ts)
+
+    def reset(self, rdi, ts):
+        """Restart from a value computed over the stored history (see stored_rdi)."""
+        self.value, self.ts = rdi, ts
+        self.recent.clear()
+
+    def update(self, candle) -> bool:
+        """
+        Fold in a finalized Candle. Returns False if it is older than every
+        candle kept, in which case the value is unchanged and the caller has
+        to reseed from the stored history.
+        """
+        ts = candle.timestamp
+        if self.ts is None or ts > self.ts:
+            self.recent.append((ts, self.value, candle))
+            self.value = update_rdi(self.value, candle)
+            self.ts = ts
+            return True
+        if not self.recent or ts < self.recent[0][0]:
+            return False
+
+        entries = list(self.recent)
+        i = next(j for j, entry in enumerate(entries) if entry[0] >= ts)
+        if entries[i][0] == ts:
+            entries[i] = (ts, entries[i][1], candle)
+        else:
+            entries.insert(i, (ts, entries[i][1], candle))
+        value = entries[i][1]
+        for j in range(i, len(entries)):
+            entries[j] = (entries[j][0], value, entries[j][2])
+            value = update_rdi(value, entries[j][2])
+        self.recent = deque(entries, maxlen=self.recent.maxlen)
+        self.value = value
+        return True
+
+
+def backoff_delay(attempt: int, base: float = WS_BACKOFF_BASE, cap: float = WS_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff, so redundant connections never reconnect in lockstep."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def ws_feed(conn_id, subscription: dict, queue: asyncio.Queue, url=KRAKEN_WS_V2_URL,
+                  on_up=None, on_down=None, journal=None):
+    """
+    Keep one connection subscribed forever, putting (conn_id, message) on `queue`.
+
+    Reconnects with jittered backoff. `await on_up(conn_id)` runs after each
+    (re)subscribe; `on_down(conn_id)` after each failure and may return a
+    status suffix for the log line. Every raw frame is appended to `journal`
+    (a JournalWriter) with its receive time, if given.
+    """
+    attempt = 0
+    while True:
+        try:
+            async with websockets.connect(url, ssl=ssl_context if url.startswith("wss") else None) as ws:
+                await ws.send(json.dumps(subscription))
+                if on_up is not None:
+                    await on_up(conn_id)
+                async for message in ws:
+                    attempt = 0
+                    if journal is not None:
+                        journal.append(time.time_ns(), conn_id, message)
+                    await queue.put((conn_id, message))
+                raise ConnectionError("connection closed")
+
+        except Exception as e:
+            status = on_down(conn_id) if on_down is not None else ""
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"\n{TerminalColors.RED}⚠️ WS #{conn_id} error: {e}, reconnecting in {delay:.1f}s{status}...{TerminalColors.RESET}")
+            await asyncio.sleep(delay)
+
+
+async def run_kraken_collector(db, store=None, ring=None, export_parquet=True,
+                               connections=WS_CONNECTIONS, url=KRAKEN_WS_V2_URL, backfill=True,
+                               journal=None, source=None):
+    """
+    Stream LIVE_PAIR candles into `db` (and optionally the candle store and live ring).
+
+    With `connections` > 1 the same subscription is held on several
+    connections at once and updates are deduplicated on arrival, so one
+    connection dropping or lagging neither stalls nor gaps the feed. Each
+    connection reconnects on its own with jittered backoff; the REST backfill
+    only runs when every connection was down at the same time, and the
+    candle held at that moment is discarded so the backfill, not a stale
+    copy, decides what that window stores. `backfill` may also be a
+    callable(db) -> candles written, used in place of the REST backfill.
+
+    `journal` (a JournalWriter) captures every raw frame as received. With
+    `source`, an async iterable of (conn_id, message) such as frames read back
+    from a journal, no connection is opened: the frames go through the same
+    decode path as fast as possible and the function returns when they run out.
+    """
     current_candle_ts = None
     counter = 0
     latest_candle = None
     spinner_index = 0
+    live_rdi = LiveRdi(*stored_rdi(db)) if ring is not None else None
+    reseed_push = None
+    live_output = source is None
 
-    async def connect():
-        nonlocal current_candle_ts, counter, latest_candle, spinner_index
-        async with websockets.connect(KRAKEN_WS_V2_URL, ssl=ssl_context) as ws:
-            await ws.send(json.dumps({
-                "method": "subscribe",
-                "params": {
-                    "channel": "ohlc",
-                    "symbol": [LIVE_PAIR],
-                    "interval": ALL_INTERVAL
-                }
-            }))
-
-            async for message in ws:
-                try:
-                    data = json.loads(message)
-
-                    # Spinner to show activity
-                    spinner_char = spinner_frames[spinner_index % len(spinner_frames)]
-                    spinner_index += 1
-
-                    if data.get("channel") != "ohlc" or "data" not in data:
-                        # Print spinner to show live feed even on non-candle messages
-                        print(f"\r{TerminalColors.CYAN}Live streaming {spinner_char}...{TerminalColors.RESET}", end='', flush=True)
-                        continue
-
-                    candles = data["data"]
-                    if not isinstance(candles, list):
-                        candles = [candles]
-
-                    for candle in candles:
-                        ts = datetime.fromisoformat(candle["interval_begin"].replace("Z", "+00:00"))
-
-                        c = {
-                            "timestamp": ts.isoformat(),
-                            "open": float(candle["open"]),
-                            "high": float(candle["high"]),
-                            "low": float(candle["low"]),
-                            "close": float(candle["close"]),
-                            "volume": float(candle["volume"]),
-                        }
-
-                        # Sanity checks
-                        if c["high"] == c["low"] or c["volume"] == 0:
-                            continue
-                        if not (c["low"] <= c["open"] <= c["high"] and c["low"] <= c["close"] <= c["high"]):
-                            continue
-
-                        # New candle finalized?
-                        if current_candle_ts != ts:
-                            if latest_candle:
-                                db.save(latest_candle)
-                                counter += 1
-
-                                # Poetic candle printout
-                                print(f"\n{TerminalColors.GREEN}{TerminalColors.BOLD}📡 Candle #{counter} Finalized — {latest_candle['timestamp']}{TerminalColors.RESET}")
-                                print(f"{TerminalColors.YELLOW}O:{latest_candle['open']:.5f}  H:{latest_candle['high']:.5f}  L:{latest_candle['low']:.5f}  C:{latest_candle['close']:.5f}  V:{latest_candle['volume']:.2f}{TerminalColors.RESET}")
-                                print(f"{TerminalColors.MAGENTA}✨ The market's pulse, a moment captured in time ✨{TerminalColors.RESET}")
-
-                                if counter % 1 == 0:
-                                    db.export_to_parquet(PARQUET_PATH)
-                                    print(f"{TerminalColors.CYAN}💽 Exported to Parquet @ {latest_candle['timestamp']}{TerminalColors.RESET}")
-
-                            current_candle_ts = ts
-
-                        # Always update latest candle
-                        latest_candle = c
-
-                    # Show live streaming spinner after candles processed
-                    print(f"\r{TerminalColors.CYAN}Live streaming {spinner_char}...{TerminalColors.RESET}", end='', flush=True)
+    queue = asyncio.Queue()
+    dedup = FeedDeduplicator()
+    # Finalized bars come from the exchange: spikes are flagged, not dropped
+    validator = CandleValidator(ALL_INTERVAL, flag_spikes=True)
+    live = set()
+    gap_open = False
+    BACKFILL = object()
 
-                except Exception as e:
-                    print(f"\n{TerminalColors.RED}❌ Parse fail: {e}{TerminalColors.RESET}")
+    subscription = {
+        "method": "subscribe",
+        "params": {
+            "channel": "ohlc",
+            "symbol": [LIVE_PAIR],
+            "interval": ALL_INTERVAL
+        }
+    }
 
-    while True:
+    async def on_up(conn_id):
+        nonlocal gap_open
+        live.add(conn_id)
+        if gap_open:
+            # Every connection was down: repair whatever closed meanwhile
+            gap_open = False
+            if backfill:
+                await queue.put((conn_id, BACKFILL))
+
+    def on_down(conn_id):
+        nonlocal gap_open, latest_candle, current_candle_ts
+        live.discard(conn_id)
+        if not live:
+            gap_open = True
+            # The held candle may have changed before it closed; let the backfill write that window
+            latest_candle = None
+            current_candle_ts = None
+        return f" ({len(live)}/{connections} connections live)"
+
+    async def reseed():
+        # A correction older than LiveRdi keeps: recompute off the event loop, then publish
+        nonlocal reseed_push
+        candle, reseed_push = reseed_push, None
+        live_rdi.reset(*await asyncio.to_thread(stored_rdi, db))
+        ring.push(candle, rdi=live_rdi.value)
+
+    async def repair():
+        nonlocal store
         try:
-            await connect()
+            patched = await asyncio.to_thread(backfill if callable(backfill) else backfill_recent, db)
+            if patched:
+                print(f"\n{TerminalColors.CYAN}🔧 Backfilled {patched} candles after reconnect{TerminalColors.RESET}")
+                if ring is not None:
+                    # The backfilled candles never went through update_rdi
+                    live_rdi.reset(*await asyncio.to_thread(stored_rdi, db))
+                if store is not None:
+                    # Backfilled rows can land mid-history, so rebuild the append-only store
+                    db.export_to_store(store.path)
+                    store = CandleStore(store.path)
+        except Exception as e:
+            print(f"\n{TerminalColors.RED}❌ Backfill after reconnect failed: {e}{TerminalColors.RESET}")
+
+    def handle(conn_id, message):
+        nonlocal current_candle_ts, counter, latest_candle, spinner_index, reseed_push
+        try:
+            data = json.loads(message)
+
+            # Spinner to show activity
+            spinner_char = spinner_frames[spinner_index % len(spinner_frames)]
+            spinner_index += 1
+
+            if data.get("channel") != "ohlc" or "data" not in data:
+                # Print spinner to show live feed even on non-candle messages
+                if live_output:
+                    print(f"\r{TerminalColors.CYAN}Live streaming {spinner_char}...{TerminalColors.RESET}", end='', flush=True)
+                return
+
+            candles = data["data"]
+            if not isinstance(candles, list):
+                candles = [candles]
+
+            # Another connection already delivered these updates (or newer ones)
+            updates = [Candle.from_ws(candle) for candle in candles if dedup.accept(candle, conn_id)]
+
+            # Sanity checks on the whole message at once; bad updates are skipped
+            checks = check_candles(updates, validator.step) if updates else ()
+            for c, reason in zip(updates, checks):
+                if reason != OK:
+                    continue
+                ts = c.timestamp
+
+                # New candle finalized?
+                if current_candle_ts != ts:
+                    # Order and spike checks against the candles already stored
+                    kept, verdict = validator.validate_candle(latest_candle) if latest_candle else (True, "ok")
+                    if not kept:
+                        print(f"\n{TerminalColors.RED}🧹 Dropped candle {latest_candle.iso}: {verdict}{TerminalColors.RESET}")
+                    elif latest_candle:
+                        db.save(latest_candle)
+                        if verdict != "ok":
+                            db.flag_many([(latest_candle.iso, verdict)])
+                            print(f"\n{TerminalColors.YELLOW}🚩 Flagged candle {latest_candle.iso}: {verdict}{TerminalColors.RESET}")
+                        if store is not None:
+                            store.append(latest_candle)
+                        if ring is not None:
+                            if live_rdi.update(latest_candle):
+                                ring.push(latest_candle, rdi=live_rdi.value)
+                            else:
+                                reseed_push = latest_candle
+                        counter += 1
+
+                        # Poetic candle printout
+                        if live_output:
+                            print(f"\n{TerminalColors.GREEN}{TerminalColors.BOLD}📡 Candle #{counter} Finalized — {latest_candle.iso}{TerminalColors.RESET}")
+                            print(f"{TerminalColors.YELLOW}O:{latest_candle.open:.5f}  H:{latest_candle.high:.5f}  L:{latest_candle.low:.5f}  C:{latest_candle.close:.5f}  V:{latest_candle.volume:.2f}{TerminalColors.RESET}")
+                            print(f"{TerminalColors.MAGENTA}✨ The market's pulse, a moment captured in time ✨{TerminalColors.RESET}")
+
+                        if export_parquet and counter % 1 == 0:
+                            db.export_to_parquet(PARQUET_PATH)
+                            print(f"{TerminalColors.CYAN}💽 Exported to Parquet @ {latest_candle.iso}{TerminalColors.RESET}")
+
+                    current_candle_ts = ts
+
+                # Always update latest candle
+                latest_candle = c
+
+            # Show live streaming spinner after candles processed
+            if live_output:
+                print(f"\r{TerminalColors.CYAN}Live streaming {spinner_char}...{TerminalColors.RESET}", end='', flush=True)
+
         except Exception as e:
-            print(f"\n{TerminalColors.RED}⚠️ WS error: {e}, reconnecting in 5s...{TerminalColors.RESET}")
-            await asyncio.sleep(5)
+            print(f"\n{TerminalColors.RED}❌ Parse fail: {e}{TerminalColors.RESET}")
+
+    if source is not None:
+        async for conn_id, message in source:
+            handle(conn_id, message)
+            if reseed_push is not None:
+                await reseed()
+        print(f"{TerminalColors.CYAN}🔁 Replayed {spinner_index} frames, {counter} candles finalized{TerminalColors.RESET}")
+        return
+
+    feeds = [asyncio.create_task(ws_feed(i, subscription, queue, url, on_up, on_down, journal))
+             for i in range(connections)]
+    try:
+        while True:
+            conn_id, message = await queue.get()
+            if message is BACKFILL:
+                await repair()
+            else:
+                handle(conn_id, message)
+                if reseed_push is not None:
+                    await reseed()
+    finally:
+        for task in feeds:
+            task.cancel()
+        await asyncio.gather(*feeds, return_exceptions=True)
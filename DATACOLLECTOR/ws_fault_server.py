@@ -0,0 +1,141 @@
+import asyncio, json, random, time, websockets
+from datetime import datetime, timezone
+
+from DYNAMICS.dynamic_params import LIVE_PAIR, ALL_INTERVAL
+
+
+class FaultyOhlcServer:
+    """
+    Local stand-in for the Kraken v2 `ohlc` channel that misbehaves on purpose.
+
+    A single synthetic market produces `updates_per_candle` updates per candle
+    every `tick` seconds. Every client sees the same updates, each with its
+    own random latency (up to `max_delay`), and each connection is killed
+    without a close frame with probability `kill_rate` per update. `truth`
+    holds the final version of every candle for checking what a collector
+    stored.
+    """
+
+    def __init__(self, n_candles=200, updates_per_candle=5, tick=0.02, max_delay=0.02,
+                 kill_rate=0.005, seed=0, start_epoch=1_750_000_000):
+        self.n_candles = n_candles
+        self.updates_per_candle = updates_per_candle
+        self.tick = tick
+        self.max_delay = max_delay
+        self.kill_rate = kill_rate
+        self.rng = random.Random(seed)
+        self.start_epoch = start_epoch - start_epoch % (ALL_INTERVAL * 60)
+        self.clients = set()
+        self.current = None
+        self.truth = {}
+        self.kills = 0
+
+    def _iso(self, epoch: float) -> str:
+        return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def _updates(self):
+        price = 100_000.0
+        for k in range(self.n_candles):
+            begin = self.start_epoch + k * ALL_INTERVAL * 60
+            o = h = l = price
+            volume = 0.0
+            for u in range(self.updates_per_candle):
+                price *= 1 + self.rng.gauss(0, 1e-3)
+                h, l = max(h, price), min(l, price)
+                volume += self.rng.random() + 0.01
+                entry = {
+                    "symbol": LIVE_PAIR, "open": o, "high": h, "low": l, "close": price,
+                    "vwap": price, "trades": u + 1, "volume": volume,
+                    "interval_begin": self._iso(begin), "interval": ALL_INTERVAL,
+                    "timestamp": self._iso(begin + (u + 1) * ALL_INTERVAL * 60 / (self.updates_per_candle + 1)),
+                }
+                self.truth[begin] = (o, h, l, price, volume)
+                yield entry
+
+    async def _client(self, ws):
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        try:
+            await ws.recv()  # subscribe request
+            if self.current is not None:
+                await ws.send(json.dumps({"channel": "ohlc", "type": "snapshot", "data": [self.current]}))
+            deliver_at = 0.0
+            while True:
+                sent_at, message = await queue.get()
+                # Per-connection latency, but messages stay in order on each connection
+                deliver_at = max(deliver_at, sent_at + self.rng.uniform(0, self.max_delay))
+                await asyncio.sleep(max(0.0, deliver_at - time.monotonic()))
+                if self.rng.random() < self.kill_rate:
+                    self.kills += 1
+                    ws.transport.abort()
+                    return
+                await ws.send(message)
+        finally:
+            self.clients.discard(queue)
+
+    async def produce(self):
+        for entry in self._updates():
+            self.current = entry
+            message = json.dumps({"channel": "ohlc", "type": "update", "data": [entry]})
+            now = time.monotonic()
+            for queue in list(self.clients):
+                queue.put_nowait((now, message))
+            await asyncio.sleep(self.tick)
+
+    def backfill(self, db) -> int:
+        """REST stand-in: write the final version of every closed candle missing from `db`."""
+        if self.current is None:
+            return 0
+        step = ALL_INTERVAL * 60
+        open_begin = int(datetime.fromisoformat(self.current["interval_begin"].replace("Z", "+00:00")).timestamp())
+        ranges = db.missing_ranges(self.start_epoch, open_begin)
+        rows = [{"timestamp": datetime.fromtimestamp(t, tz=timezone.utc).isoformat(),
+                 **dict(zip(("open", "high", "low", "close", "volume"), self.truth[t]))}
+                for s, e in ranges for t in range(int(s.timestamp()), int(e.timestamp()), step)]
+        return db.insert_many(rows)
+
+    async def serve(self, host="127.0.0.1", port=0):
+        server = await websockets.serve(self._client, host, port)
+        self.url = f"ws://{host}:{server.sockets[0].getsockname()[1]}"
+        return server
+
+
+async def verify(connections: int, seed: int = 0, **server_kwargs) -> dict:
+    """Run the collector against a FaultyOhlcServer and compare what it stored with the truth."""
+    import os, tempfile
+    from MNDB.db_manager import DatabaseManager
+    from DATACOLLECTOR.kraken_ws_data import run_kraken_collector
+
+    server = FaultyOhlcServer(seed=seed, **server_kwargs)
+    ws_server = await server.serve()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "verify.sqlite"))
+        collector = asyncio.create_task(run_kraken_collector(
+            db, export_parquet=False, connections=connections, url=server.url, backfill=server.backfill))
+        await asyncio.sleep(0.5)  # let the connections subscribe before the market opens
+        await server.produce()
+        await asyncio.sleep(server.max_delay * 5)
+        collector.cancel()
+        await asyncio.gather(collector, return_exceptions=True)
+        ws_server.close()
+
+        stored = {int(datetime.fromisoformat(r[0]).timestamp()): tuple(r[1:]) for r in
+                  db.conn.execute("SELECT timestamp, open, high, low, close, volume FROM candles").fetchall()}
+        db.close()
+
+    expected = dict(sorted(server.truth.items())[:-1])  # the last candle never finalizes
+    missing = [ts for ts in expected if ts not in stored]
+    wrong = [ts for ts in expected if ts in stored and
+             any(abs(a - b) > 1e-9 * max(1.0, abs(a)) for a, b in zip(stored[ts], expected[ts]))]
+    return {"connections": connections, "kills": server.kills, "expected": len(expected),
+            "missing": len(missing), "wrong": len(wrong)}
+
+
+if __name__ == "__main__":
+    import contextlib, io
+
+    for connections in (1, 2, 3):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(verify(connections))
+        print(f"{connections} connection(s): {result['kills']:>3} connections killed, "
+              f"{result['missing']:>3}/{result['expected']} candles missing, {result['wrong']} stored with stale values")
@@ -13,8 +13,43 @@ HOW_MANY_CANDLES = 666    #1080000
 
 START_AT_MINUTES = MIN.get(TIME_FRAME[NUMBER]) * HOW_MANY_CANDLES
 
+REST_MAX_CANDLES = 720    # Kraken's REST OHLC only serves the most recent 720 candles of an interval
+
 ALL_INTERVAL = MIN.get(TIME_FRAME[NUMBER]) # in minutes
 
 POST = f"test1_{START_AT_MINUTES}"
 DB_PATH = f"data/crypto_{ALL_INTERVAL}_min_{POST}.sqlite"
 PARQUET_PATH = f"data/ohlc_{ALL_INTERVAL}_min_{POST}.parquet"
+STORE_PATH = f"data/ohlc_{ALL_INTERVAL}_min_{POST}.candles"
+
+DASH_LOOKBACK_MINUTES = None  # e.g. 1440 to chart only the last day; None = full history
+
+RING_NAME = f"algo_{ALL_INTERVAL}m_{POST}"
+RING_SIZE = 1024  # candles kept in shared memory for live readers
+
+BOOK_DEPTH = 25              # levels per side subscribed on the v2 book channel (10, 25, 100, 500, 1000)
+BOOK_SNAPSHOT_DIR = "data/book"
+BOOK_SNAPSHOT_SECONDS = 60   # how often the book is snapshotted to disk
+
+WS_CONNECTIONS = 2           # redundant hot-standby connections for the live candle feed
+WS_BACKOFF_BASE = 0.5        # seconds; reconnect delay is jittered in [0, min(MAX, BASE * 2**attempt)]
+WS_BACKOFF_MAX = 30
+
+SCREENER_PAIRS = [LIVE_PAIR]     # pairs watched by the live RDI screener
+SCREENER_ENTRY_THRESHOLD = 3     # buy_streak needed to report a pair
+SCREENER_ATR_WINDOW = 2880       # bars in the causal ATR percentile gate (10 days of 5 min bars)
+SCREENER_CLOSE_GRACE = 0.5       # seconds after a bar boundary before the bar is treated as closed
+
+CAPTURE_RAW_WS = False           # journal every raw candle-feed frame for replay/reprocessing
+JOURNAL_DIR = "data/journal"
+JOURNAL_SEGMENT_SECONDS = 3600   # one compressed segment file per hour of capture
+
+TRADE_BARS = []                  # (kind, size) bars built from the trade channel, e.g. [("volume", 5.0), ("dollar", 500_000.0)]; empty = off
+TRADE_BAR_GRACE = 2.0            # seconds a trade may arrive out of order before it counts as late and is dropped
+BAR_DB_PATH = f"data/trade_bars_{POST}.sqlite"
+
+VALIDATION_SPIKE_THRESHOLD = 0.1 # |log close change| vs. both the previous bar and the last accepted close that marks a spike
+
+LEAN_MEMORY = False              # float32 prices, int8 signals and only the requested columns through loaders, indicators and backtests
+LEAN_PRICE_DECIMALS = 1          # lean mode keeps a price column float32 only if no value moves by half of this tick
+LEAN_VOLUME_DECIMALS = 8         # same for volume
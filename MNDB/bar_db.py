@@ -0,0 +1,75 @@
+import sqlite3, os
+import pandas as pd
+from threading import Lock
+from MNDB.candle_buffer import CandleBuffer
+
+
+class BarDatabase:
+    """
+    SQLite store for bars built from the trade channel.
+
+    Volume and dollar bars close on traded size, not on a clock, and time bars
+    may use any interval, so none of them belong in the interval-keyed
+    `candles` table or its gap index. Every bar is keyed by (kind, size,
+    seq) instead, so several bar types can share one file. `seq` is the
+    bucket index for time bars and a running count for volume and dollar
+    bars, so two event bars opening in the same microsecond stay distinct.
+
+    A time bar written again (e.g. the bucket a restart cut in two) is
+    merged into the stored one rather than replacing it.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = Lock()
+        self._create_table()
+
+    def _create_table(self):
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    kind TEXT NOT NULL,
+                    size REAL NOT NULL,
+                    seq INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (kind, size, seq)
+                )
+            """)
+            self.conn.commit()
+
+    def next_seq(self, kind: str, size: float) -> int:
+        """First unused sequence number for one bar type."""
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM bars WHERE kind = ? AND size = ?",
+                                    (kind, float(size))).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def save_bars(self, kind: str, size: float, bars: CandleBuffer, seqs) -> int:
+        """Insert a CandleBuffer of `kind`/`size` bars with their sequence numbers in a single transaction."""
+        if len(bars) == 0:
+            return 0
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO bars (kind, size, seq, timestamp, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, size, seq) DO UPDATE SET
+                    high = max(high, excluded.high),
+                    low = min(low, excluded.low),
+                    close = excluded.close,
+                    volume = volume + excluded.volume
+            """, ((kind, float(size), int(seq)) + row for seq, row in zip(seqs, bars.rows())))
+            self.conn.commit()
+        return len(bars)
+
+    def to_frame(self, kind: str, size: float) -> pd.DataFrame:
+        """Every stored bar of one type, oldest first."""
+        with self.lock:
+            return pd.read_sql("""
+                SELECT timestamp, open, high, low, close, volume FROM bars
+                WHERE kind = ? AND size = ? ORDER BY seq
+            """, self.conn, params=(kind, float(size)), parse_dates=["timestamp"])
+
+    def close(self):
+        self.conn.close()
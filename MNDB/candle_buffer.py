@@ -0,0 +1,233 @@
+# ================= mndb/candle_buffer.py =================
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+TICKS_PER_SECOND = {"s": 1, "ms": 1_000, "us": 1_000_000, "ns": 1_000_000_000}
+
+
+def iso_utc(epoch: int) -> str:
+    """Epoch seconds -> the ISO string stored in the candles table."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+class Candle:
+    """
+    A single OHLCV bar. `timestamp` is integer epoch seconds (UTC).
+
+    Supports read-only item access (`candle["close"]`) so it can be passed
+    anywhere a candle dict was accepted before.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, timestamp, open, high, low, close, volume):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_ws(cls, msg):
+        """Build from one entry of a Kraken v2 `ohlc` channel message."""
+        ts = datetime.fromisoformat(msg["interval_begin"].replace("Z", "+00:00"))
+        return cls(int(ts.timestamp()), float(msg["open"]), float(msg["high"]),
+                   float(msg["low"]), float(msg["close"]), float(msg["volume"]))
+
+    @classmethod
+    def from_rest(cls, row):
+        """Build from one row of the Kraken REST OHLC array [time, o, h, l, c, vwap, volume, count]."""
+        return cls(int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[6]))
+
+    @property
+    def iso(self) -> str:
+        return iso_utc(self.timestamp)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def as_row(self):
+        """Tuple in `candles` table column order."""
+        return (self.iso, self.open, self.high, self.low, self.close, self.volume)
+
+    def as_dict(self):
+        return {"timestamp": self.iso, "open": self.open, "high": self.high,
+                "low": self.low, "close": self.close, "volume": self.volume}
+
+    def __repr__(self):
+        return (f"Candle({self.iso}, O={self.open}, H={self.high}, L={self.low}, "
+                f"C={self.close}, V={self.volume})")
+
+
+class CandleBuffer:
+    """
+    Growable struct-of-arrays batch of candles.
+
+    Each field lives in its own NumPy array (int64 epoch timestamps in `unit`,
+    "s" by default, and float64 prices); capacity doubles when full.
+    `to_frame()` and `column()` hand out views, so converting a batch to
+    pandas does not copy the price data.
+    """
+
+    def __init__(self, capacity: int = 1024, unit: str = "s"):
+        self.unit = unit
+        self._n = 0
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._values = {f: np.empty(capacity, dtype=np.float64) for f in FIELDS[1:]}
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, needed):
+        capacity = len(self._ts)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # Fresh arrays: views handed out earlier keep pointing at the old ones
+        ts = np.empty(capacity, dtype=np.int64)
+        ts[:self._n] = self._ts[:self._n]
+        self._ts = ts
+        for f, old in self._values.items():
+            new = np.empty(capacity, dtype=np.float64)
+            new[:self._n] = old[:self._n]
+            self._values[f] = new
+
+    def append(self, timestamp, open, high, low, close, volume):
+        i = self._n
+        self._reserve(i + 1)
+        self._ts[i] = timestamp
+        v = self._values
+        v["open"][i] = open
+        v["high"][i] = high
+        v["low"][i] = low
+        v["close"][i] = close
+        v["volume"][i] = volume
+        self._n = i + 1
+
+    def append_candle(self, candle: Candle):
+        self.append(candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume)
+
+    def extend_rest(self, rows, end_epoch=None):
+        """
+        Append Kraken REST OHLC rows in one vectorized step, stopping at the
+        first row whose time is >= end_epoch. Returns the number appended.
+        """
+        if not rows:
+            return 0
+        ts = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        n = len(rows) if end_epoch is None else int(np.searchsorted(ts, end_epoch, side="left"))
+        if n == 0:
+            return 0
+        # Kraken sends prices as strings; convert the whole block at once
+        values = np.array(rows[:n], dtype=object)[:, [1, 2, 3, 4, 6]].astype(np.float64)
+        i = self._n
+        self._reserve(i + n)
+        self._ts[i:i + n] = ts[:n]
+        for j, f in enumerate(FIELDS[1:]):
+            self._values[f][i:i + n] = values[:, j]
+        self._n = i + n
+        return n
+
+    def column(self, name) -> np.ndarray:
+        if name == "timestamp":
+            return self._ts[:self._n]
+        return self._values[name][:self._n]
+
+    def take(self, index) -> "CandleBuffer":
+        """New buffer holding the rows selected by `index` (a boolean mask or integer positions)."""
+        ts = self._ts[:self._n][index]
+        out = CandleBuffer(max(1, len(ts)), self.unit)
+        out._ts[:len(ts)] = ts
+        for f in FIELDS[1:]:
+            out._values[f][:len(ts)] = self._values[f][:self._n][index]
+        out._n = len(ts)
+        return out
+
+    def epoch_seconds(self) -> np.ndarray:
+        return self._ts[:self._n] // TICKS_PER_SECOND[self.unit]
+
+    def __getitem__(self, i) -> Candle:
+        if not -self._n <= i < self._n:
+            raise IndexError(i)
+        i %= self._n
+        v = self._values
+        return Candle(int(self._ts[i]) // TICKS_PER_SECOND[self.unit], float(v["open"][i]), float(v["high"][i]),
+                      float(v["low"][i]), float(v["close"][i]), float(v["volume"][i]))
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def rows(self):
+        """Yield tuples in `candles` table column order, for executemany."""
+        v = [self._values[f][:self._n].tolist() for f in FIELDS[1:]]
+        iso = np.datetime_as_string(self._ts[:self._n].astype(f"M8[{self.unit}]"), unit=self.unit).tolist()
+        return zip((f"{s}+00:00" for s in iso), *v)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame view of the batch; only the timestamp column is materialized."""
+        data = {"timestamp": pd.to_datetime(self._ts[:self._n], unit=self.unit, utc=True)}
+        for f in FIELDS[1:]:
+            data[f] = self._values[f][:self._n]
+        return pd.DataFrame(data, copy=False)
+
+
+if __name__ == "__main__":
+    # Memory / throughput comparison against the list-of-dicts path
+    import sqlite3
+    import time
+    import tracemalloc
+
+    N = 200_000
+    raw = [[1_700_000_000 + 300 * i, "100.1", "101.2", "99.3", "100.4", "100.5", "12.6", 42] for i in range(N)]
+
+    def build_dicts():
+        return [{
+            "timestamp": datetime.fromtimestamp(r[0], tz=timezone.utc).isoformat(),
+            "open": float(r[1]), "high": float(r[2]), "low": float(r[3]),
+            "close": float(r[4]), "volume": float(r[6]),
+        } for r in raw]
+
+    def build_candles():
+        return [Candle.from_rest(r) for r in raw]
+
+    def build_buffer():
+        buf = CandleBuffer()
+        buf.extend_rest(raw)
+        return buf
+
+    for name, build in [("dict list", build_dicts), ("Candle list", build_candles), ("CandleBuffer", build_buffer)]:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        batch = build()
+        elapsed = time.perf_counter() - t0
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:<14} build {elapsed * 1e3:8.1f} ms   {mem / N:7.1f} bytes/candle")
+
+    def insert(rows):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE candles (timestamp TEXT PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL)")
+        t0 = time.perf_counter()
+        conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        return time.perf_counter() - t0
+
+    dicts = build_dicts()
+    t_dict = insert((d["timestamp"], d["open"], d["high"], d["low"], d["close"], d["volume"]) for d in dicts)
+    t_buf = insert(build_buffer().rows())
+    print(f"executemany     dicts {t_dict * 1e3:8.1f} ms   buffer {t_buf * 1e3:8.1f} ms")
+
+    t0 = time.perf_counter()
+    pd.DataFrame(dicts)
+    t_df_dict = time.perf_counter() - t0
+    buf = build_buffer()
+    t0 = time.perf_counter()
+    buf.to_frame()
+    print(f"to DataFrame    dicts {t_df_dict * 1e3:8.1f} ms   buffer {(time.perf_counter() - t0) * 1e3:8.1f} ms")
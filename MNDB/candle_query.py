@@ -0,0 +1,187 @@
+import os
+import sqlite3
+
+import duckdb
+import pandas as pd
+
+from DYNAMICS.dynamic_params import PARQUET_PATH, DB_PATH, BOOK_SNAPSHOT_DIR
+
+OHLCV = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class CandleQuery:
+    """
+    Embedded DuckDB over the candle history.
+
+    Views are defined over the Parquet export (or the SQLite DB when there is
+    no export yet), so every query is a multi-threaded vectorized scan with
+    projection and filter pushdown: only the referenced columns and the row
+    groups matching the time filter are read, and aggregations never
+    materialize the full history in Python.
+
+    Registered views:
+      - candles: the OHLCV history for LIVE_PAIR
+      - book:    order book snapshots, when BOOK_SNAPSHOT_DIR has any
+      - any pair added with `register(name, path)`, for cross-pair joins
+    """
+
+    def __init__(self, parquet_path=PARQUET_PATH, db_path=DB_PATH, threads=None, book_dir=BOOK_SNAPSHOT_DIR):
+        self.con = duckdb.connect(":memory:")
+        self.con.execute("SET TimeZone = 'UTC'")
+        if threads is not None:
+            self.con.execute(f"SET threads = {int(threads)}")
+
+        if os.path.exists(parquet_path):
+            self.register("candles", parquet_path)
+        elif os.path.exists(db_path):
+            self._register_sqlite("candles", db_path)
+        else:
+            raise FileNotFoundError(f"No candle data at {parquet_path} or {db_path}")
+
+        if book_dir and os.path.isdir(book_dir) and any(
+                f.endswith(".parquet") for _, _, files in os.walk(book_dir) for f in files):
+            self.con.execute(f"""
+                CREATE OR REPLACE VIEW book AS
+                SELECT *, regexp_extract(filename, '([^/\\\\]+)[/\\\\][^/\\\\]+$', 1) AS symbol
+                FROM read_parquet('{os.path.join(book_dir, "*", "*.parquet")}', filename = true)
+            """)
+
+    def register(self, name: str, path: str):
+        """Expose a Parquet file (or glob) as view `name`."""
+        self.con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM read_parquet('{path}')")
+
+    def _register_sqlite(self, name: str, db_path: str):
+        # The sqlite extension scans the table directly; timestamps are stored as ISO text
+        try:
+            self.con.execute("LOAD sqlite")
+        except duckdb.Error:
+            try:
+                self.con.execute("INSTALL sqlite")
+                self.con.execute("LOAD sqlite")
+            except duckdb.Error:
+                # Extension unavailable (offline): load the table once into DuckDB instead
+                with sqlite3.connect(db_path) as src:
+                    rows = pd.read_sql_query("SELECT timestamp, open, high, low, close, volume FROM candles", src)
+                rows["timestamp"] = pd.to_datetime(rows["timestamp"], utc=True)
+                self.con.register(f"{name}_sqlite", rows)
+                self.con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {name}_sqlite ORDER BY timestamp")
+                self.con.unregister(f"{name}_sqlite")
+                return
+
+        self.con.execute(f"ATTACH '{db_path}' AS src (TYPE sqlite, READ_ONLY)")
+        self.con.execute(f"""
+            CREATE OR REPLACE VIEW {name} AS
+            SELECT CAST(timestamp AS TIMESTAMPTZ) AS timestamp, open, high, low, close, volume
+            FROM src.candles
+        """)
+
+    def close(self):
+        self.con.close()
+
+    # ------------------------------
+    # SQL
+    # ------------------------------
+    def sql(self, query: str, params=None, as_: str = "pandas"):
+        """Run SQL against the registered views; returns pandas ("pandas") or a pyarrow Table ("arrow")."""
+        result = self.con.execute(query, params or [])
+        if as_ == "arrow":
+            return result.fetch_arrow_table()
+        if as_ == "pandas":
+            return result.df()
+        raise ValueError("as_ must be 'pandas' or 'arrow'")
+
+    @staticmethod
+    def _where(start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= CAST(? AS TIMESTAMPTZ)")
+            params.append(str(start))
+        if end is not None:
+            clauses.append("timestamp < CAST(? AS TIMESTAMPTZ)")
+            params.append(str(end))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    # ------------------------------
+    # Helpers
+    # ------------------------------
+    def candles(self, start=None, end=None, columns=None, table="candles", as_="pandas"):
+        """Raw candles in [start, end), only the requested columns."""
+        columns = list(columns) if columns else list(OHLCV)
+        if "timestamp" not in columns:
+            columns.insert(0, "timestamp")
+        where, params = self._where(start, end)
+        return self.sql(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY timestamp", params, as_)
+
+    def resample(self, interval: str = "1 hour", start=None, end=None, table="candles", as_="pandas"):
+        """
+        OHLCV bars re-bucketed to `interval` (any DuckDB interval, e.g. '15 minutes', '1 day').
+
+        Buckets are labelled by their open time, like the source candles.
+        """
+        where, params = self._where(start, end)
+        return self.sql(f"""
+            SELECT time_bucket(INTERVAL '{interval}', timestamp) AS timestamp,
+                   arg_min(open, timestamp)  AS open,
+                   max(high)                 AS high,
+                   min(low)                  AS low,
+                   arg_max(close, timestamp) AS close,
+                   sum(volume)               AS volume,
+                   count(*)                  AS candles
+            FROM {table}{where}
+            GROUP BY 1
+            ORDER BY 1
+        """, params, as_)
+
+    def groupby(self, by: str, aggs: dict, start=None, end=None, table="candles", as_="pandas"):
+        """
+        Grouped aggregation, e.g.
+            groupby("hour(timestamp)", {"volume": "sum(volume)", "range": "avg(high - low)"})
+        """
+        where, params = self._where(start, end)
+        select = ", ".join(f"{expr} AS {name}" for name, expr in aggs.items())
+        return self.sql(f"""
+            SELECT {by} AS grp, {select}
+            FROM {table}{where}
+            GROUP BY 1
+            ORDER BY 1
+        """, params, as_)
+
+    def monthly_returns(self, start=None, end=None, table="candles", as_="pandas"):
+        """Close-to-close return per calendar month (UTC), in percent."""
+        where, params = self._where(start, end)
+        return self.sql(f"""
+            WITH monthly AS (
+                SELECT date_trunc('month', timestamp) AS month, arg_max(close, timestamp) AS close
+                FROM {table}{where}
+                GROUP BY 1
+            )
+            SELECT month, 100 * (close / lag(close) OVER (ORDER BY month) - 1) AS monthly_return_pct
+            FROM monthly
+            ORDER BY month
+        """, params, as_)
+
+    def hourly_volatility(self, start=None, end=None, table="candles", as_="pandas"):
+        """Standard deviation of log returns by hour of day (UTC), plus mean volume."""
+        where, params = self._where(start, end)
+        return self.sql(f"""
+            WITH r AS (
+                SELECT timestamp, volume,
+                       ln(close / lag(close) OVER (ORDER BY timestamp)) AS log_return
+                FROM {table}{where}
+            )
+            SELECT hour(timestamp) AS hour,
+                   stddev_samp(log_return) AS volatility,
+                   avg(volume)             AS avg_volume,
+                   count(*)                AS candles
+            FROM r
+            GROUP BY 1
+            ORDER BY 1
+        """, params, as_)
+
+
+if __name__ == "__main__":
+    q = CandleQuery()
+    print(q.resample("1 day").tail())
+    print(q.monthly_returns())
+    print(q.hourly_volatility().head())
+    print(q.sql("EXPLAIN SELECT close FROM candles WHERE timestamp >= '2025-06-18'").iloc[0, 1])
@@ -0,0 +1,275 @@
+# ================= mndb/candle_store.py =================
+import os
+import numpy as np
+import pandas as pd
+from DYNAMICS.dynamic_params import (ALL_INTERVAL, PARQUET_PATH, STORE_PATH, LEAN_MEMORY,
+                                     LEAN_PRICE_DECIMALS, LEAN_VOLUME_DECIMALS)
+from MNDB.gap_index import to_epoch
+
+# File layout (little endian):
+#   64 byte header  -> magic, version, interval, count, capacity
+#   timestamp block -> capacity x int64 (epoch nanoseconds, UTC)
+#   open/high/low/close/volume blocks -> capacity x float64 each
+#
+# Each column is contiguous, so readers get plain NumPy views of the page cache.
+# The writer fills the rows first and bumps `count` last, so a reader never
+# sees a half-written candle.
+
+MAGIC = b"CNDLSTR1"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("interval", "<u4"),
+    ("count", "<u8"),
+    ("capacity", "<u8"),
+])
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+COLUMN_DTYPES = {"timestamp": np.dtype("<i8"), **{c: np.dtype("<f8") for c in COLUMNS[1:]}}
+ITEM_SIZE = 8
+
+
+def _column_offset(capacity, i):
+    return HEADER_SIZE + i * capacity * ITEM_SIZE
+
+
+def _map_columns(path, capacity, mode):
+    return {
+        name: np.memmap(path, dtype=COLUMN_DTYPES[name], mode=mode,
+                        offset=_column_offset(capacity, i), shape=(capacity,))
+        for i, name in enumerate(COLUMNS)
+    }
+
+
+def _epoch_ns(timestamps) -> np.ndarray:
+    return pd.to_datetime(timestamps, utc=True).dt.tz_convert(None).dt.as_unit("ns").to_numpy().view("<i8")
+
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a candle store")
+    return header[0]
+
+
+def store_version(path):
+    """(inode, count, last timestamp) of a store, read from the header and one column cell."""
+    header = read_header(path)
+    count, capacity = int(header["count"]), int(header["capacity"])
+    last = None
+    if count:
+        last = int(np.fromfile(path, dtype="<i8", count=1,
+                               offset=_column_offset(capacity, 0) + (count - 1) * ITEM_SIZE)[0])
+    return os.stat(path).st_ino, count, last
+
+
+class CandleStore:
+    """
+    Append-only, memory-mapped columnar candle file with a single writer.
+
+    Timestamps must be strictly increasing; re-appending the latest timestamp
+    overwrites that row (an in-progress candle being finalized).
+    """
+
+    def __init__(self, path, interval_minutes=ALL_INTERVAL, capacity=1 << 16):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, interval_minutes, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path, interval_minutes, capacity, columns=None, count=0):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(HEADER_SIZE + len(COLUMNS) * capacity * ITEM_SIZE)
+        header = np.memmap(tmp_path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        header[0] = (MAGIC, VERSION, interval_minutes, 0, capacity)
+        if columns is not None and count:
+            cols = _map_columns(tmp_path, capacity, "r+")
+            for name in COLUMNS:
+                cols[name][:count] = columns[name][:count]
+                cols[name].flush()
+            header["count"] = count
+        header.flush()
+        del header
+        os.replace(tmp_path, path)
+
+    def _open(self):
+        self.header = np.memmap(self.path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        if self.header["magic"][0] != MAGIC:
+            raise ValueError(f"{self.path} is not a candle store")
+        self.capacity = int(self.header["capacity"][0])
+        self.interval = int(self.header["interval"][0])
+        self.columns = _map_columns(self.path, self.capacity, "r+")
+
+    def __len__(self):
+        return int(self.header["count"][0])
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        count = len(self)
+        self._create(self.path, self.interval, capacity, self.columns, count)
+        self._open()
+
+    def last_timestamp(self):
+        n = len(self)
+        return int(self.columns["timestamp"][n - 1]) if n else None
+
+    def append(self, candle) -> bool:
+        """Append one candle dict; returns False if it is older than the last stored row."""
+        ts = to_epoch(candle["timestamp"]) * 1_000_000_000
+        n = len(self)
+        last = self.last_timestamp()
+        if last is not None and ts < last:
+            return False
+
+        row = n - 1 if last == ts else n
+        if row >= self.capacity:
+            self._grow(row + 1)
+
+        self.columns["timestamp"][row] = ts
+        for name in COLUMNS[1:]:
+            self.columns[name][row] = candle[name]
+        self.header["count"] = max(n, row + 1)
+        return True
+
+    def extend(self, df: pd.DataFrame) -> int:
+        """Append the rows of `df` that are newer than the last stored row. Returns rows written."""
+        if df.empty:
+            return 0
+        ts = _epoch_ns(df["timestamp"])
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        last = self.last_timestamp()
+        keep = ts > last if last is not None else np.ones(len(ts), dtype=bool)
+        keep &= np.append(ts[1:] != ts[:-1], True)  # last copy of duplicate timestamps wins
+        ts = ts[keep]
+        if len(ts) == 0:
+            return 0
+
+        n = len(self)
+        if n + len(ts) > self.capacity:
+            self._grow(n + len(ts))
+
+        self.columns["timestamp"][n:n + len(ts)] = ts
+        for name in COLUMNS[1:]:
+            self.columns[name][n:n + len(ts)] = df[name].to_numpy(dtype="<f8")[order][keep]
+        self.header["count"] = n + len(ts)
+        return len(ts)
+
+    def flush(self):
+        for col in self.columns.values():
+            col.flush()
+        self.header.flush()
+
+    @classmethod
+    def write_frame(cls, path, df: pd.DataFrame, interval_minutes=ALL_INTERVAL):
+        """Atomically replace the store at `path` with the contents of `df`."""
+        ts = _epoch_ns(df["timestamp"])
+        order = np.argsort(ts, kind="stable")
+        columns = {"timestamp": ts[order]}
+        for name in COLUMNS[1:]:
+            columns[name] = df[name].to_numpy(dtype="<f8")[order]
+        capacity = max(1 << 16, 1 << int(len(ts)).bit_length())
+        cls._create(path, interval_minutes, capacity, columns, len(ts))
+
+
+def _utc(ts):
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _with_timestamp(columns):
+    if columns is None:
+        return list(COLUMNS)
+    return ["timestamp"] + [c for c in columns if c != "timestamp"]
+
+
+def open_candles(path, start=None, end=None, columns=None) -> pd.DataFrame:
+    """
+    Map a candle store read-only and return it as a DataFrame.
+
+    `start` (inclusive) / `end` (exclusive) are located by binary search on the
+    sorted timestamp column, so only the requested rows are touched. Price and
+    volume columns are zero-copy views of the file; only the timestamp column
+    is materialized when it is localized to UTC.
+    """
+    columns = _with_timestamp(columns)
+    header = read_header(path)
+    count, capacity = int(header["count"]), int(header["capacity"])
+    if count == 0:
+        return pd.DataFrame(columns=columns)
+
+    cols = _map_columns(path, capacity, "r")
+    ts = cols["timestamp"][:count]
+    lo = 0 if start is None else int(np.searchsorted(ts, _utc(start).value, side="left"))
+    hi = count if end is None else int(np.searchsorted(ts, _utc(end).value, side="left"))
+
+    data = {"timestamp": pd.Series(ts[lo:hi].view("M8[ns]")).dt.tz_localize("UTC")}
+    for name in columns[1:]:
+        data[name] = cols[name][lo:hi]
+    return pd.DataFrame(data, copy=False)
+
+
+def read_parquet_range(path, start=None, end=None, columns=None, lean: bool = False) -> pd.DataFrame:
+    """
+    Read `path` keeping only rows with start <= timestamp < end.
+
+    The bounds are pushed down to pyarrow, which skips every row group whose
+    min/max statistics fall outside the range (see DatabaseManager.export_to_parquet).
+    With `lean`, columns are read one at a time and narrowed by `lean_frame`
+    before the next one is read, so the float64 frame never exists whole.
+    """
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", _utc(start)))
+    if end is not None:
+        filters.append(("timestamp", "<", _utc(end)))
+    if lean:
+        df = pd.DataFrame({c: lean_frame(pd.read_parquet(path, columns=[c], filters=filters or None))[c]
+                           for c in _with_timestamp(columns)}, copy=False)
+    else:
+        df = pd.read_parquet(path, columns=_with_timestamp(columns), filters=filters or None)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df
+
+
+def lean_frame(df: pd.DataFrame, price_decimals: int = LEAN_PRICE_DECIMALS,
+               volume_decimals: int = LEAN_VOLUME_DECIMALS) -> pd.DataFrame:
+    """
+    Downcast float64 candle columns to float32 where precision allows.
+
+    A column is narrowed only if no value moves by half a tick or more
+    (`price_decimals` for prices, `volume_decimals` for volume); otherwise it
+    is kept as is. Other columns are passed through without copying.
+    """
+    data = {}
+    for name in df.columns:
+        column = df[name]
+        if column.dtype == np.float64:
+            values = column.to_numpy()
+            small = values.astype(np.float32)
+            tick = 10.0 ** -(volume_decimals if name == "volume" else price_decimals)
+            if np.all((np.abs(small - values) < tick / 2) | np.isnan(values)):
+                column = pd.Series(small, index=df.index, name=name, copy=False)
+        data[name] = column
+    return pd.DataFrame(data, copy=False)
+
+
+def load_candles(store_path=STORE_PATH, parquet_path=PARQUET_PATH, start=None, end=None, columns=None,
+                 lean: bool = LEAN_MEMORY) -> pd.DataFrame:
+    """
+    Read candles from the memory-mapped store when it exists, otherwise from Parquet.
+
+    With `lean`, prices (and volume, if its precision allows) come back as float32.
+    """
+    if store_path and os.path.exists(store_path):
+        df = open_candles(store_path, start, end, columns)
+        return lean_frame(df) if lean else df
+    return read_parquet_range(parquet_path, start, end, columns, lean)
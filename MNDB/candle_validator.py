@@ -0,0 +1,265 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from DYNAMICS.dynamic_params import ALL_INTERVAL, VALIDATION_SPIKE_THRESHOLD
+from MNDB.candle_buffer import FIELDS, CandleBuffer, iso_utc
+
+# Rejection reasons, in priority order: a row is reported under the first one that applies
+REASONS = ("ok", "non_finite", "ohlc_inconsistent", "flat_bar", "zero_volume",
+           "misaligned", "duplicate", "out_of_order", "spike")
+OK, NON_FINITE, OHLC_INCONSISTENT, FLAT_BAR, ZERO_VOLUME, MISALIGNED, DUPLICATE, OUT_OF_ORDER, SPIKE = range(len(REASONS))
+
+
+def check_rows(timestamp, open_, high, low, close, volume, step: int = ALL_INTERVAL * 60) -> np.ndarray:
+    """
+    Checks that need no neighbouring rows, over whole arrays at once.
+
+    Returns a uint8 reason code per row (OK = 0). `timestamp` is epoch
+    seconds of the interval start.
+    """
+    open_, high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close, volume))
+    reason = np.zeros(len(open_), dtype=np.uint8)
+    # Lowest priority first, so higher-priority reasons overwrite
+    reason[np.asarray(timestamp, dtype=np.int64) % step != 0] = MISALIGNED
+    reason[volume <= 0] = ZERO_VOLUME
+    reason[high == low] = FLAT_BAR
+    reason[~((low <= open_) & (open_ <= high) & (low <= close) & (close <= high))] = OHLC_INCONSISTENT
+    finite = np.isfinite(open_) & np.isfinite(high) & np.isfinite(low) & np.isfinite(close) & np.isfinite(volume)
+    reason[~finite] = NON_FINITE
+    return reason
+
+
+def check_candles(candles, step: int = ALL_INTERVAL * 60) -> np.ndarray:
+    """`check_rows` for a list of Candle objects, e.g. the entries of one WS message."""
+    columns = np.array([[getattr(c, f) for f in FIELDS] for c in candles], dtype=np.float64).reshape(-1, len(FIELDS))
+    return check_rows(columns[:, 0].astype(np.int64), *columns[:, 1:].T, step=step)
+
+
+class ValidationReport:
+    """
+    Outcome of one validated batch: the reason code of every input row.
+
+    Rows whose code is in `flagged` were kept despite it; they are counted in
+    `flags` rather than `counts`.
+    """
+
+    def __init__(self, timestamp, reason, flagged=()):
+        self.timestamp = np.asarray(timestamp)
+        self.reason = reason
+        self.flagged = tuple(flagged)
+        counts = np.bincount(reason, minlength=len(REASONS))
+        self.counts = {REASONS[i]: int(n) for i, n in enumerate(counts) if i != OK and i not in self.flagged and n}
+        self.flags = {REASONS[i]: int(counts[i]) for i in self.flagged if counts[i]}
+
+    @property
+    def total(self) -> int:
+        return len(self.reason)
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def accepted(self) -> int:
+        return self.total - self.rejected
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per rejected or flagged candle: its timestamp, the reason and whether it was kept."""
+        bad = np.flatnonzero(self.reason != OK)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(self.timestamp[bad], unit="s", utc=True),
+            "reason": np.asarray(REASONS, dtype=object)[self.reason[bad]],
+            "kept": np.isin(self.reason[bad], self.flagged),
+        })
+
+    def flagged_rows(self) -> list:
+        """(timestamp, reason) of every kept-but-flagged row, for DatabaseManager.flag_many."""
+        rows = np.flatnonzero(np.isin(self.reason, self.flagged))
+        return [(iso_utc(int(self.timestamp[i])), REASONS[self.reason[i]]) for i in rows]
+
+    def __str__(self):
+        if not self.rejected and not self.flags:
+            return f"{self.total} candles, none rejected"
+        parts = []
+        if self.rejected:
+            detail = ", ".join(f"{name}={n}" for name, n in self.counts.items())
+            parts.append(f"{self.rejected}/{self.total} candles rejected ({detail})")
+        if self.flags:
+            detail = ", ".join(f"{name}={n}" for name, n in self.flags.items())
+            parts.append(f"{sum(self.flags.values())}/{self.total} kept but flagged ({detail})")
+        return "; ".join(parts)
+
+
+class CandleValidator:
+    """
+    Vectorized ingestion checks shared by the live feed and the REST backfill.
+
+    Besides the per-row checks of `check_rows`, a batch must be in time
+    order: of repeated timestamps only the last copy is kept (what INSERT OR
+    REPLACE would have stored), rows earlier than one already kept are
+    out_of_order, and so is anything at or before the last timestamp accepted
+    from a previous batch.
+
+    A spike is a close more than `spike_threshold` (log change) away from
+    both the previous bar and the last accepted close. That rejects a bar
+    that jumps and reverts without rejecting the bar that reverts; a genuine
+    level shift costs its first bar only. Everything is NumPy over the batch
+    except a walk over the (rare) spike candidates.
+
+    State (last accepted timestamp/close, last seen close) carries over
+    between calls, so one validator can follow a stream bar by bar; use a
+    fresh one for unrelated batches such as separate backfill gaps.
+
+    With `flag_spikes`, spikes are reported but kept: meant for bars the
+    exchange has finalized, where a big move may be real and dropping it
+    would leave a hole. The spike reference stays at the last unflagged
+    close. The structural checks always reject.
+    """
+
+    def __init__(self, interval_minutes: int = ALL_INTERVAL, spike_threshold: float = VALIDATION_SPIKE_THRESHOLD,
+                 flag_spikes: bool = False):
+        self.step = interval_minutes * 60
+        self.spike_threshold = spike_threshold
+        self.flagged = (SPIKE,) if flag_spikes else ()
+        self.last_ts = None
+        self.last_close = None
+        self.prev_close = None
+        self.totals = Counter()
+
+    def reasons(self, timestamp, open_, high, low, close, volume) -> np.ndarray:
+        """Reason code per row (OK = 0); advances the stream state past the accepted rows."""
+        ts = np.asarray(timestamp, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+        reason = check_rows(ts, open_, high, low, close, volume, self.step)
+
+        idx = np.flatnonzero(reason == OK)
+        if len(idx):
+            idx = self._order(ts, reason, idx)
+        if len(idx) and self.spike_threshold:
+            self._spikes(close, reason, idx)
+            self.prev_close = float(close[idx[-1]])
+
+        accepted = np.flatnonzero(reason == OK)
+        if len(accepted):
+            self.last_close = float(close[accepted[-1]])
+        kept = np.flatnonzero(self.keeps(reason))
+        if len(kept):
+            self.last_ts = int(ts[kept[-1]])
+        counts = np.bincount(reason, minlength=len(REASONS))
+        self.totals.update({REASONS[i]: int(n) for i, n in enumerate(counts) if n})
+        return reason
+
+    def _order(self, ts, reason, idx) -> np.ndarray:
+        t = ts[idx]
+        if len(t) > 1 and not (t[1:] > t[:-1]).all():
+            # Keep the last copy of each timestamp
+            order = np.argsort(t, kind="stable")
+            s = t[order]
+            dup = np.zeros(len(t), dtype=bool)
+            dup[order[:-1][s[:-1] == s[1:]]] = True
+            reason[idx[dup]] = DUPLICATE
+            idx, t = idx[~dup], t[~dup]
+            # Earlier than a row kept before it
+            late = np.zeros(len(t), dtype=bool)
+            late[1:] = t[1:] < np.maximum.accumulate(t)[:-1]
+            reason[idx[late]] = OUT_OF_ORDER
+            idx, t = idx[~late], t[~late]
+        if self.last_ts is not None and len(t) and t[0] <= self.last_ts:
+            reason[idx[t == self.last_ts]] = DUPLICATE
+            reason[idx[t < self.last_ts]] = OUT_OF_ORDER
+            idx = idx[t > self.last_ts]
+        return idx
+
+    def _spikes(self, close, reason, idx):
+        log_close = np.log(close[idx])
+        previous = np.empty(len(idx))
+        previous[0] = np.log(self.prev_close) if self.prev_close else np.nan
+        previous[1:] = log_close[:-1]
+        threshold = self.spike_threshold
+        candidates = np.flatnonzero(np.abs(log_close - previous) > threshold)
+        if not len(candidates):
+            return
+        last_accepted = np.log(self.last_close) if self.last_close else np.nan
+        rejected = set()
+        for j in candidates:
+            k = j - 1
+            while k in rejected:
+                k -= 1
+            reference = log_close[k] if k >= 0 else last_accepted
+            if abs(log_close[j] - reference) > threshold:
+                rejected.add(j)
+        reason[idx[sorted(rejected)]] = SPIKE
+
+    def keeps(self, reason):
+        """True where a reason code (scalar or array) means the row is kept: OK or a flag-only reason."""
+        return (reason == OK) | np.isin(reason, self.flagged)
+
+    def clean(self, candles: CandleBuffer) -> tuple:
+        """(CandleBuffer of kept rows, ValidationReport) for a batch."""
+        epochs = candles.epoch_seconds()
+        reason = self.reasons(epochs, *(candles.column(f) for f in FIELDS[1:]))
+        return candles.take(self.keeps(reason)), ValidationReport(epochs, reason, self.flagged)
+
+    def validate_candle(self, candle) -> tuple:
+        """Check one Candle against the stream so far; returns (kept, "ok" or the reason)."""
+        reason = self.reasons([candle.timestamp], [candle.open], [candle.high], [candle.low],
+                              [candle.close], [candle.volume])
+        return bool(self.keeps(reason[0])), REASONS[reason[0]]
+
+
+if __name__ == "__main__":
+    # Throughput on clean and faulty batches, and the report on the local history
+    import time
+    from DYNAMICS.dynamic_params import PARQUET_PATH
+
+    N = 5_000_000
+    step = ALL_INTERVAL * 60
+    rng = np.random.default_rng(7)
+    ts = 1_600_000_000 - 1_600_000_000 % step + step * np.arange(N, dtype=np.int64)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 1e-3, N)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.random(N) * 1e-3)
+    low = np.minimum(open_, close) * (1 - rng.random(N) * 1e-3)
+    volume = rng.random(N) * 10 + 0.01
+
+    def run(name, *arrays):
+        best = float("inf")
+        for _ in range(3):
+            validator = CandleValidator(ALL_INTERVAL)
+            t0 = time.perf_counter()
+            reason = validator.reasons(*arrays)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:<7}: {N / best / 1e6:5.1f} M rows/s  {ValidationReport(arrays[0], reason)}")
+
+    run("clean", ts, open_, high, low, close, volume)
+
+    # 0.1% of rows each: flat, zero volume, bad OHLC, NaN, misaligned, duplicate, swapped, spike
+    faulty = [a.copy() for a in (ts, open_, high, low, close, volume)]
+    fts, fo, fh, fl, fc, fv = faulty
+    pick = lambda: rng.choice(np.arange(1, N - 1), N // 1000, replace=False)
+    i = pick()
+    fl[i] = fh[i]
+    fv[pick()] = 0
+    i = pick()
+    fo[i] = fh[i] * 1.01
+    fc[pick()] = np.nan
+    fts[pick()] += 7
+    i = pick()
+    fts[i] = fts[i - 1]
+    i = pick()
+    fts[i], fts[i + 1] = fts[i + 1].copy(), fts[i].copy()
+    i = pick()
+    fc[i] *= 1.5
+    fh[i] = fc[i]
+    fo[i + 1] = fc[i]
+    fh[i + 1] = np.maximum(fh[i + 1], fc[i])
+    run("faulty", *faulty)
+
+    df = pd.read_parquet(PARQUET_PATH)
+    buf = CandleBuffer()
+    for row in df.itertuples(index=False):
+        buf.append(int(row.timestamp.timestamp()), row.open, row.high, row.low, row.close, row.volume)
+    clean, report = CandleValidator(ALL_INTERVAL).clean(buf)
+    print(f"{PARQUET_PATH}: {report}")
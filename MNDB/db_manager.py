@@ -2,13 +2,23 @@
 import sqlite3, os
 import pandas as pd
 from threading import Lock
+from DYNAMICS.dynamic_params import ALL_INTERVAL
+from MNDB.gap_index import GapIndex
+from MNDB.candle_store import CandleStore
+from MNDB.candle_buffer import Candle, CandleBuffer
+
+# Rows per Parquet row group: small enough that a recent-window read touches
+# one or two groups, large enough to keep per-group overhead negligible.
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
 
 class DatabaseManager:
-    def __init__(self, db_path):
+    def __init__(self, db_path, interval_minutes=ALL_INTERVAL):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.lock = Lock()
         self._create_table()
+        self.gap_index = GapIndex(interval_minutes)
+        self._load_gap_index()
 
     def _create_table(self):
         with self.lock:
@@ -18,23 +28,109 @@ class DatabaseManager:
                     open REAL, high REAL, low REAL, close REAL, volume REAL
                 )
             """)
+            # Slots the REST API has already served past without a usable candle
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS settled_slots (
+                    timestamp INTEGER PRIMARY KEY
+                )
+            """)
+            # Stored candles that failed a soft check (e.g. spike) but were kept
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS candle_flags (
+                    timestamp TEXT PRIMARY KEY,
+                    reason TEXT
+                )
+            """)
             self.conn.commit()
 
+    def _load_gap_index(self):
+        # Epoch conversion happens inside SQLite; Python only sees integers
+        with self.lock:
+            rows = self.conn.execute("SELECT CAST(strftime('%s', timestamp) AS INTEGER) FROM candles").fetchall()
+            rows += self.conn.execute("SELECT timestamp FROM settled_slots").fetchall()
+        self.gap_index.load([r[0] for r in rows if r[0] is not None])
+
     def insert_candle(self, candle):
+        if isinstance(candle, Candle):
+            row = candle.as_row()
+        else:
+            row = (candle["timestamp"], candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"])
         with self.lock:
             self.conn.execute("""
                 INSERT OR REPLACE INTO candles (timestamp, open, high, low, close, volume)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (candle["timestamp"], candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"]))
+            """, row)
             self.conn.commit()
+        self.gap_index.add(candle["timestamp"])
+
+    def insert_many(self, candles):
+        """Insert a CandleBuffer (or an iterable of candle dicts) in a single transaction."""
+        if isinstance(candles, CandleBuffer):
+            rows = candles.rows()
+            epochs = candles.epoch_seconds()
+        else:
+            rows = [(c["timestamp"], c["open"], c["high"], c["low"], c["close"], c["volume"]) for c in candles]
+            epochs = [r[0] for r in rows]
+        if len(epochs) == 0:
+            return 0
+        with self.lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO candles (timestamp, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+        self.gap_index.add_many(epochs)
+        return len(epochs)
 
     def save(self, candle):
         self.insert_candle(candle)
 
-    def export_to_parquet(self, pq_path):
+    def save_many(self, candles):
+        return self.insert_many(candles)
+
+    def flag_many(self, flags):
+        """Record (timestamp, reason) pairs for stored candles that were kept despite a soft check."""
+        flags = list(flags)
+        if flags:
+            with self.lock:
+                self.conn.executemany("INSERT OR REPLACE INTO candle_flags (timestamp, reason) VALUES (?, ?)", flags)
+                self.conn.commit()
+        return len(flags)
+
+    def settle(self, start_ts, end_ts):
+        """
+        Mark the still-missing slots in [start_ts, end_ts) as settled: the REST
+        API has served candles past them, so a later backfill would get nothing
+        new. They stop showing up in `missing_ranges`; a live candle for one is
+        still stored normally. Returns the number of slots settled.
+        """
+        step = self.gap_index.step
+        epochs = [e for s, t in self.missing_ranges(start_ts, end_ts)
+                  for e in range(int(s.timestamp()), int(t.timestamp()), step)]
+        if epochs:
+            with self.lock:
+                self.conn.executemany("INSERT OR IGNORE INTO settled_slots (timestamp) VALUES (?)", ((e,) for e in epochs))
+                self.conn.commit()
+            self.gap_index.add_many(epochs)
+        return len(epochs)
+
+    def missing_ranges(self, start_ts, end_ts):
+        return self.gap_index.missing_ranges(start_ts, end_ts)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every stored candle, oldest first."""
         with self.lock:
-            df = pd.read_sql("SELECT * FROM candles ORDER BY timestamp", self.conn, parse_dates=["timestamp"])
-            df.to_parquet(pq_path, index=False)
+            return pd.read_sql("SELECT * FROM candles ORDER BY timestamp", self.conn, parse_dates=["timestamp"])
+
+    def export_to_parquet(self, pq_path):
+        df = self.to_frame()
+        # Sorted rows + per-group min/max statistics let readers skip row groups by time
+        df.to_parquet(pq_path, index=False, compression="zstd",
+                      row_group_size=PARQUET_ROW_GROUP_SIZE, write_statistics=True)
+
+    def export_to_store(self, store_path):
+        df = self.to_frame()
+        CandleStore.write_frame(store_path, df, self.gap_index.step // 60)
 
     def close(self):
         self.conn.close()
\ No newline at end of file
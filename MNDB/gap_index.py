@@ -0,0 +1,93 @@
+# ================= mndb/gap_index.py =================
+import numpy as np
+from datetime import datetime, timezone
+from threading import Lock
+
+
+def to_epoch(ts) -> int:
+    """Convert an ISO string, datetime or pandas Timestamp to integer epoch seconds (UTC)."""
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+class GapIndex:
+    """
+    Index of which interval slots are present in the candles table.
+
+    A slot is `epoch_seconds // (interval_minutes * 60)`, so finding holes is
+    integer arithmetic on a sorted array rather than a row-by-row scan.
+    """
+
+    def __init__(self, interval_minutes: int):
+        self.step = interval_minutes * 60
+        self.lock = Lock()
+        self._slots = np.empty(0, dtype=np.int64)
+        self._pending = []
+
+    def load(self, epochs):
+        """Replace the index with the given epoch seconds (any order, duplicates allowed)."""
+        slots = np.asarray(epochs, dtype=np.int64) // self.step
+        with self.lock:
+            self._slots = np.unique(slots)
+            self._pending = []
+
+    def add(self, ts):
+        """Mark the slot containing `ts` as present."""
+        slot = to_epoch(ts) // self.step
+        with self.lock:
+            self._pending.append(slot)
+
+    def add_many(self, timestamps):
+        """Mark many slots present; accepts epoch-second arrays or anything `to_epoch` understands."""
+        arr = np.asarray(timestamps)
+        if arr.dtype.kind not in "iu":
+            arr = np.fromiter((to_epoch(t) for t in timestamps), dtype=np.int64, count=len(arr))
+        with self.lock:
+            self._pending.extend((arr.astype(np.int64) // self.step).tolist())
+
+    def _merged(self) -> np.ndarray:
+        # Caller holds the lock; folds pending inserts into the sorted array.
+        if self._pending:
+            self._slots = np.union1d(self._slots, np.asarray(self._pending, dtype=np.int64))
+            self._pending = []
+        return self._slots
+
+    def __len__(self):
+        with self.lock:
+            return len(self._merged())
+
+    def missing_ranges(self, start_ts, end_ts) -> list:
+        """
+        Return the missing slots in [start_ts, end_ts) as a list of
+        (range_start, range_end) UTC datetimes, end exclusive.
+        """
+        lo = -(-to_epoch(start_ts) // self.step)  # first full slot at/after start
+        hi = to_epoch(end_ts) // self.step        # slot containing end (excluded)
+        if hi <= lo:
+            return []
+
+        with self.lock:
+            slots = self._merged()
+            left, right = np.searchsorted(slots, [lo, hi])
+            present = slots[left:right]
+
+        # Sentinels around the window turn every hole into a diff > 1
+        bounds = np.concatenate(([lo - 1], present, [hi]))
+        holes = np.flatnonzero(np.diff(bounds) > 1)
+        gap_starts = bounds[holes] + 1
+        gap_ends = bounds[holes + 1]
+
+        return [
+            (datetime.fromtimestamp(int(s) * self.step, tz=timezone.utc),
+             datetime.fromtimestamp(int(e) * self.step, tz=timezone.utc))
+            for s, e in zip(gap_starts, gap_ends)
+        ]
+
+    def missing_count(self, start_ts, end_ts) -> int:
+        step = self.step
+        return sum(int((e.timestamp() - s.timestamp()) // step) for s, e in self.missing_ranges(start_ts, end_ts))
@@ -0,0 +1,183 @@
+# ================= mndb/live_ring.py =================
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory, resource_tracker
+from DYNAMICS.dynamic_params import RING_NAME, RING_SIZE
+from MNDB.gap_index import to_epoch
+
+# Shared memory layout (all little-endian 8 byte words):
+#   header -> magic, capacity, n_fields, seq, written, writer pid (0 once closed)
+#   rows   -> capacity x n_fields float64, row = written % capacity
+#
+# Seqlock protocol: the single writer makes `seq` odd, writes the row and
+# `written`, then makes `seq` even again. Readers copy what they need and
+# retry if `seq` was odd or changed underneath them, so they never block
+# the writer and never see a torn candle.
+
+MAGIC = 0x474E4952454C4443  # "CDLERING"
+HEADER_WORDS = 6
+_MAGIC, _CAPACITY, _FIELDS, _SEQ, _WRITTEN, _WRITER_PID = range(HEADER_WORDS)
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume", "rdi")
+
+# Segments created here (or in a forked parent) are already tracked by our resource tracker
+_CREATED = set()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LiveCandleRing:
+    """Fixed-size ring of the most recent candles in shared memory (one writer, many readers)."""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_WORDS,), dtype="<u8", buffer=shm.buf)
+        if self.header[_MAGIC] != MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a candle ring")
+        self.capacity = int(self.header[_CAPACITY])
+        self.rows = np.ndarray((self.capacity, len(FIELDS)), dtype="<f8",
+                               buffer=shm.buf, offset=HEADER_WORDS * 8)
+
+    @classmethod
+    def create(cls, name=RING_NAME, capacity=RING_SIZE):
+        """
+        Create the ring (writer side).
+
+        An existing segment is replaced only when it is a candle ring whose
+        writer process is gone (left by a crashed run). If its writer is still
+        running, or the segment is not a candle ring, FileExistsError is raised
+        so a second collector cannot take over a live ring.
+        """
+        size = (HEADER_WORDS + capacity * len(FIELDS)) * 8
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            try:
+                existing = cls.attach(name)
+            except ValueError:
+                raise FileExistsError(f"Shared memory '{name}' exists and is not a candle ring") from None
+            pid = int(existing.header[_WRITER_PID])
+            existing.close()
+            if pid and _pid_alive(pid):
+                raise FileExistsError(f"Candle ring '{name}' is still written by pid {pid}") from None
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((HEADER_WORDS,), dtype="<u8", buffer=shm.buf)
+        header[:] = (MAGIC, capacity, len(FIELDS), 0, 0, os.getpid())
+        del header
+        _CREATED.add(name)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=RING_NAME):
+        """Attach to an existing ring (reader side). Raises FileNotFoundError if no writer is running."""
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            if name not in _CREATED:
+                # Pre-3.13 the resource tracker would unlink the writer's segment when a reader exits
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    # ------------------------------ writer ------------------------------
+    def push(self, candle, **indicators):
+        """Publish one finalized candle dict plus optional indicator values (missing ones are NaN)."""
+        values = [float(to_epoch(candle["timestamp"]))]
+        values += [float(candle[f]) for f in FIELDS[1:6]]
+        values += [float(indicators.get(f, np.nan)) for f in FIELDS[6:]]
+
+        header = self.header
+        written = int(header[_WRITTEN])
+        header[_SEQ] += 1                       # odd: write in progress
+        self.rows[written % self.capacity] = values
+        header[_WRITTEN] = written + 1
+        header[_SEQ] += 1                       # even: consistent again
+
+    # ------------------------------ readers -----------------------------
+    @property
+    def seq(self) -> int:
+        return int(self.header[_SEQ])
+
+    @property
+    def live(self) -> bool:
+        """
+        False once the writer closed the ring or its process died. A reader
+        still maps the old segment after the collector restarts and creates a
+        new one, so it should re-attach when this turns False.
+        """
+        pid = int(self.header[_WRITER_PID])
+        return pid != 0 and _pid_alive(pid)
+
+    def _read(self, since, retries=1000):
+        header = self.header
+        for _ in range(retries):
+            seq = int(header[_SEQ])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            written = int(header[_WRITTEN])
+            n = min(written - since, written, self.capacity)
+            first = written - n
+            idx = np.arange(first, written) % self.capacity
+            rows = self.rows[idx]               # fancy indexing copies
+            if int(header[_SEQ]) == seq:
+                return written, rows
+            time.sleep(0)
+        raise TimeoutError("Candle ring writer kept the seqlock busy")
+
+    def snapshot(self):
+        """Return (written, rows) with every candle still held in the ring, oldest first."""
+        return self._read(0)
+
+    def poll(self, since: int):
+        """Return (written, rows) for candles published after the `written` counter `since`."""
+        if int(self.header[_WRITTEN]) == since:
+            return since, self.rows[:0].copy()
+        return self._read(max(since, 0))
+
+    def latest(self):
+        """Return the most recent candle as a dict, or None if nothing was published yet."""
+        _, rows = self._read(0)
+        if len(rows) == 0:
+            return None
+        return rows_to_frame(rows[-1:]).iloc[0].to_dict()
+
+    def to_frame(self) -> pd.DataFrame:
+        return rows_to_frame(self.snapshot()[1])
+
+    def wait(self, since: int, timeout: float = 1.0, interval: float = 0.001):
+        """Spin-poll until something newer than `since` is published or `timeout` expires."""
+        deadline = time.monotonic() + timeout
+        while int(self.header[_WRITTEN]) == since and time.monotonic() < deadline:
+            time.sleep(interval)
+        return self.poll(since)
+
+    def close(self):
+        if self.owner:
+            self.header[_WRITER_PID] = 0        # tell attached readers this segment is finished
+        del self.header, self.rows
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+            _CREATED.discard(self.shm.name.lstrip("/"))
+
+
+def rows_to_frame(rows: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=list(FIELDS))
+    df["timestamp"] = pd.to_datetime(df["timestamp"].astype("int64"), unit="s", utc=True)
+    return df
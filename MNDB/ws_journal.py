@@ -0,0 +1,261 @@
+import bisect
+import os
+import queue
+import struct
+import threading
+
+import zstandard
+
+from DYNAMICS.dynamic_params import JOURNAL_DIR, JOURNAL_SEGMENT_SECONDS
+
+# Record: receive time (ns since epoch), connection id, payload length, then the raw frame
+RECORD = struct.Struct("<qBI")
+SEGMENT_SUFFIX = ".wsj.zst"
+INDEX_SUFFIX = ".idx"
+NS = 1_000_000_000
+
+
+def _to_ns(ts) -> int:
+    """Epoch nanoseconds from None, an int (ns) or anything pandas.Timestamp accepts."""
+    if ts is None or isinstance(ts, int):
+        return ts
+    import pandas as pd
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+class JournalWriter:
+    """
+    Append-only capture of raw WebSocket frames.
+
+    `append` only packs the frame into an in-memory block, so it is safe to
+    call on the event loop. Full blocks (or blocks older than
+    `flush_seconds`) are zstd-compressed and written by a background thread,
+    each as an independent zstd frame, and every block gets a line in the
+    segment's `.idx` sidecar:
+        first_ns last_ns offset length frames
+    Segments rotate every `segment_seconds` of receive time and are named by
+    their start, so a reader can find any time range without decompressing
+    anything it does not return.
+    """
+
+    def __init__(self, name: str, root: str = JOURNAL_DIR, segment_seconds: int = JOURNAL_SEGMENT_SECONDS,
+                 block_bytes: int = 1 << 20, flush_seconds: float = 5.0, level: int = 3):
+        self.folder = os.path.join(root, name)
+        os.makedirs(self.folder, exist_ok=True)
+        self.segment_ns = segment_seconds * NS
+        self.block_bytes = block_bytes
+        self.flush_ns = int(flush_seconds * NS)
+        self.level = level
+
+        self.block = bytearray()
+        self.block_first = None
+        self.block_last = None
+        self.block_frames = 0
+        self.block_segment = None
+
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name=f"journal-{name}", daemon=True)
+        self._thread.start()
+
+    def append(self, recv_ns: int, conn_id: int, message):
+        payload = message.encode() if isinstance(message, str) else message
+        segment = recv_ns - recv_ns % self.segment_ns
+        if self.block_frames and (segment != self.block_segment or len(self.block) >= self.block_bytes
+                                  or recv_ns - self.block_first >= self.flush_ns):
+            self._hand_off()
+        if not self.block_frames:
+            self.block_first = recv_ns
+            self.block_segment = segment
+        self.block += RECORD.pack(recv_ns, conn_id, len(payload))
+        self.block += payload
+        self.block_last = recv_ns
+        self.block_frames += 1
+        self.frames += 1
+        self.bytes_in += len(payload)
+
+    def _hand_off(self):
+        self._queue.put((self.block_segment, self.block_first, self.block_last, self.block_frames, bytes(self.block)))
+        self.block = bytearray()
+        self.block_frames = 0
+
+    def _write_loop(self):
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            segment, first, last, frames, raw = item
+            data = compressor.compress(raw)
+            path = os.path.join(self.folder, f"{segment}{SEGMENT_SUFFIX}")
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            # Index line goes last: a reader never sees a block that is not fully on disk
+            with open(path + INDEX_SUFFIX, "a") as f:
+                f.write(f"{first} {last} {offset} {len(data)} {frames}\n")
+            self.bytes_out += len(data)
+
+    def flush(self):
+        """Hand over the current block and wait until everything appended so far is on disk."""
+        if self.block_frames:
+            self._hand_off()
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self.block_frames:
+            self._hand_off()
+        self._queue.put(None)
+        self._thread.join()
+
+
+class JournalReader:
+    """
+    Time-indexed reader for a JournalWriter folder.
+
+    Segments are located by name and blocks by their `.idx` lines (both
+    binary searches), so seeking to any time costs one block decompression.
+    """
+
+    def __init__(self, name: str, root: str = JOURNAL_DIR):
+        self.folder = os.path.join(root, name)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def segments(self) -> list:
+        starts = [int(f[:-len(SEGMENT_SUFFIX)]) for f in os.listdir(self.folder) if f.endswith(SEGMENT_SUFFIX)]
+        return sorted(starts)
+
+    def _index(self, segment: int) -> list:
+        path = os.path.join(self.folder, f"{segment}{SEGMENT_SUFFIX}{INDEX_SUFFIX}")
+        try:
+            with open(path) as f:
+                return [tuple(int(x) for x in line.split()) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            return []
+
+    def blocks(self, start=None, end=None):
+        """(segment, first_ns, last_ns, offset, length, frames) for blocks overlapping [start, end)."""
+        start, end = _to_ns(start), _to_ns(end)
+        segments = self.segments()
+        i = 0
+        if start is not None and segments:
+            i = max(0, bisect.bisect_right(segments, start) - 1)
+        for segment in segments[i:]:
+            if end is not None and segment >= end:
+                return
+            index = self._index(segment)
+            j = 0
+            if start is not None:
+                j = bisect.bisect_left([last for _, last, *_ in index], start)
+            for first, last, offset, length, frames in index[j:]:
+                if end is not None and first >= end:
+                    return
+                yield segment, first, last, offset, length, frames
+
+    def frames(self, start=None, end=None, decode: bool = True):
+        """Yield (recv_ns, conn_id, message) in receive order for [start, end)."""
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        unpack = RECORD.unpack_from
+        header = RECORD.size
+        handle, handle_segment = None, None
+        try:
+            for segment, first, last, offset, length, count in self.blocks(start_ns, end_ns):
+                if segment != handle_segment:
+                    if handle is not None:
+                        handle.close()
+                    handle = open(os.path.join(self.folder, f"{segment}{SEGMENT_SUFFIX}"), "rb")
+                    handle_segment = segment
+                handle.seek(offset)
+                raw = self._decompressor.decompress(handle.read(length))
+                whole = (start_ns is None or first >= start_ns) and (end_ns is None or last < end_ns)
+                pos = 0
+                for _ in range(count):
+                    recv_ns, conn_id, size = unpack(raw, pos)
+                    pos += header
+                    payload = raw[pos:pos + size]
+                    pos += size
+                    if not whole and ((start_ns is not None and recv_ns < start_ns) or
+                                      (end_ns is not None and recv_ns >= end_ns)):
+                        continue
+                    yield recv_ns, conn_id, payload.decode() if decode else payload
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def span(self):
+        """(first_ns, last_ns) covered by the journal, or None if empty."""
+        segments = self.segments()
+        if not segments:
+            return None
+        first_index, last_index = self._index(segments[0]), self._index(segments[-1])
+        if not first_index or not last_index:
+            return None
+        return first_index[0][0], last_index[-1][1]
+
+
+if __name__ == "__main__":
+    # Capture cost on the event loop, compression, seek and replay throughput
+    import asyncio, json, random, tempfile, time
+    from DYNAMICS.dynamic_params import LIVE_PAIR
+    from MNDB.db_manager import DatabaseManager
+    from DATACOLLECTOR.kraken_ws_data import run_kraken_collector
+    from MNDB.candle_buffer import iso_utc
+
+    N_FRAMES = 500_000
+    random.seed(2)
+    t_ns = 1_750_000_000 * NS
+    price = 100_000.0
+    messages = []
+    for k in range(N_FRAMES):
+        t_ns += random.randint(50, 500) * 1_000_000
+        price *= 1 + random.gauss(0, 1e-4)
+        begin = (t_ns // NS) - (t_ns // NS) % 300
+        messages.append((t_ns, k % 2, json.dumps({"channel": "ohlc", "type": "update", "data": [{
+            "symbol": LIVE_PAIR, "open": price, "high": price * 1.001, "low": price * 0.999, "close": price,
+            "vwap": price, "trades": k, "volume": 1.0 + k % 7, "interval_begin": iso_utc(begin).replace("+00:00", "Z"),
+            "interval": 5, "timestamp": iso_utc(t_ns // NS).replace("+00:00", "Z")}]})))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = JournalWriter("bench", root=tmp)
+        t0 = time.perf_counter()
+        for recv_ns, conn_id, message in messages:
+            writer.append(recv_ns, conn_id, message)
+        on_loop = time.perf_counter() - t0
+        writer.close()
+        print(f"append : {on_loop / N_FRAMES * 1e6:.2f} µs per frame on the caller's thread")
+        print(f"size   : {writer.bytes_in / 1e6:.1f} MB raw -> {writer.bytes_out / 1e6:.1f} MB "
+              f"({writer.bytes_in / writer.bytes_out:.1f}x), {len(JournalReader('bench', tmp).segments())} segments")
+
+        reader = JournalReader("bench", root=tmp)
+        t0 = time.perf_counter()
+        n = sum(1 for _ in reader.frames())
+        elapsed = time.perf_counter() - t0
+        print(f"read   : {n / elapsed:,.0f} frames/s")
+
+        first, last = reader.span()
+        target = first + (last - first) * 3 // 4
+        t0 = time.perf_counter()
+        recv_ns, _, _ = next(reader.frames(start=target))
+        print(f"seek   : {(time.perf_counter() - t0) * 1e3:.2f} ms to the frame at 75% of the journal")
+
+        async def frames():
+            for recv_ns, conn_id, message in reader.frames():
+                yield conn_id, message
+
+        db = DatabaseManager(os.path.join(tmp, "replay.sqlite"))
+        t0 = time.perf_counter()
+        asyncio.run(run_kraken_collector(db, export_parquet=False, source=frames()))
+        elapsed = time.perf_counter() - t0
+        stored = db.conn.execute("SELECT COUNT(*) FROM candles").fetchone()[0]
+        db.close()
+        print(f"replay : {N_FRAMES / elapsed:,.0f} frames/s through the collector decode path ({stored} candles stored)")
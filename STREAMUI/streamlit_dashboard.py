@@ -1,8 +1,27 @@
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from BACKTEST.main_backtesting import load_data, run_backtest
-from BACKTEST.rdi_backtest import RDIBacktestStrategy
+from BACKTEST.main_backtesting import load_data
+from BACKTEST.backtest_jobs import BacktestJobs, data_fingerprint
+from DASHUI.figure_cache import data_version
+
+POLL_SECONDS = 0.5
+
+
+@st.cache_resource
+def get_jobs() -> BacktestJobs:
+    # One worker pool and run store per Streamlit server, shared by all sessions
+    return BacktestJobs()
+
+
+@st.cache_data(show_spinner=False)
+def load_backtest_data(version):
+    # `version` only keys the cache: data is reloaded when the collector adds candles
+    data = load_data()
+    return data, data_fingerprint(data)
+
 
 def upgraged_backtest_dashboard():
     # Page configuration
@@ -22,92 +41,114 @@ def upgraged_backtest_dashboard():
     run_simulation = st.sidebar.button("Run Backtest")
 
     # Load historical OHLC data
-    data = load_data()
+    data, fingerprint = load_backtest_data(data_version())
     if data.empty:
         st.error("No data available for backtesting. Please check your data file or path!")
     else:
         st.write(f"Loaded {len(data)} records from the data source.")
 
-    # Run simulation when button is pressed
-    if run_simulation:
-        st.info("Running backtest simulation...")
-        
-        # Instantiate our RDI-based strategy (it adheres to the Strategy interface)
-        strategy = RDIBacktestStrategy(entry_threshold=entry_threshold)
-        # Run the backtest engine
-        results = run_backtest(strategy, data, initial_capital=initial_capital)
-
-        # Unpack results from the backtest simulation
-        sim_data = results["data"]
-        trades = results["trades"]
-        summary = results["summary"]
-
-        # Display performance summary
-        st.subheader("Performance Summary")
-        summary_df = pd.DataFrame.from_dict(summary, orient="index", columns=["Value"])
-        st.table(summary_df)
-
-        # Plot the equity curve using Plotly
-        st.subheader("Equity Curve")
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=sim_data["timestamp"],
-            y=sim_data["equity_curve"],
-            mode="lines",
-            name="Equity Curve",
-            line=dict(color="lime")
-        ))
-        fig.update_layout(
-            template="plotly_dark",
-            xaxis_title="Time",
-            yaxis_title="Equity",
-            height=500,
-            margin=dict(t=40, b=40)
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Display the trade log as an interactive table
-        st.subheader("Trade Log")
-        if not trades.empty:
-            st.dataframe(trades)
+    jobs = get_jobs()
+
+    # Submit in the background; identical runs come straight from the run store
+    if run_simulation and not data.empty:
+        st.session_state["run_key"] = jobs.submit(data, "RDI", {"entry_threshold": entry_threshold},
+                                                  initial_capital=initial_capital, fingerprint=fingerprint)
+
+    key = st.session_state.get("run_key")
+    if key is None:
+        return
+
+    state = jobs.state(key)
+    if state["state"] in ("queued", "running"):
+        st.info("Running backtest simulation..." if state["state"] == "running" else "Backtest queued...")
+        st.progress(min(1.0, state.get("progress", 0.0)))
+        if st.button("Cancel"):
+            jobs.cancel(key)
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+    elif state["state"] == "cancelled":
+        st.warning("Backtest cancelled.")
+    elif state["state"] == "failed":
+        st.error(f"Backtest failed: {state.get('error')}")
+    else:
+        results = jobs.result(key)
+        if results is None:
+            st.error("Backtest results are missing from the run store.")
         else:
-            st.info("No trades were executed during the backtest.")
-
-        # Feature: Monthly Returns Breakdown
-        st.subheader("📅 Monthly Returns Breakdown")
-
-        # Extract month and year from timestamps
-        sim_data["month_year"] = sim_data["timestamp"].dt.to_period("M")
-
-        # Calculate percentage return per month
-        monthly_returns = sim_data.groupby("month_year")["equity_curve"].last().pct_change().dropna()
-
-        # Convert to DataFrame
-        monthly_returns_df = monthly_returns.reset_index()
-        monthly_returns_df.columns = ["Month", "Monthly Return (%)"]
-        monthly_returns_df["Monthly Return (%)"] *= 100  # Convert to percentage
-
-        # Display as a table
-        st.table(monthly_returns_df)
-
-        # Plot the monthly returns as a bar chart
-        fig_monthly = go.Figure()
-        fig_monthly.add_trace(go.Bar(
-            x=monthly_returns_df["Month"].astype(str),
-            y=monthly_returns_df["Monthly Return (%)"],
-            name="Monthly Returns",
-            marker=dict(color="cornflowerblue")
-        ))
-        fig_monthly.update_layout(
-            template="plotly_dark",
-            xaxis_title="Month",
-            yaxis_title="Return (%)",
-            height=500,
-            margin=dict(t=40, b=40)
-        )
-        st.plotly_chart(fig_monthly, use_container_width=True)
-
-        # Optionally, show raw simulation data (toggle with an expander)
-        with st.expander("Show Simulation Data"):
-            st.dataframe(sim_data)
-            
\ No newline at end of file
+            if state.get("cached"):
+                st.success("Loaded from previous run.")
+            show_results(results)
+
+
+def show_results(results: dict):
+    sim_data = results["data"]
+    trades = results["trades"]
+    summary = results["summary"]
+
+    # Display performance summary
+    st.subheader("Performance Summary")
+    summary_df = pd.DataFrame.from_dict(summary, orient="index", columns=["Value"])
+    st.table(summary_df)
+
+    # Plot the equity curve using Plotly
+    st.subheader("Equity Curve")
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=sim_data["timestamp"],
+        y=sim_data["equity_curve"],
+        mode="lines",
+        name="Equity Curve",
+        line=dict(color="lime")
+    ))
+    fig.update_layout(
+        template="plotly_dark",
+        xaxis_title="Time",
+        yaxis_title="Equity",
+        height=500,
+        margin=dict(t=40, b=40)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Display the trade log as an interactive table
+    st.subheader("Trade Log")
+    if not trades.empty:
+        st.dataframe(trades)
+    else:
+        st.info("No trades were executed during the backtest.")
+
+    # Feature: Monthly Returns Breakdown
+    st.subheader("📅 Monthly Returns Breakdown")
+
+    # Calculate percentage return per month (grouped by a month key, not a new Period column)
+    month_year = sim_data["timestamp"].dt.tz_localize(None).dt.to_period("M")
+    monthly_returns = sim_data["equity_curve"].groupby(month_year).last().pct_change().dropna()
+
+    # Convert to DataFrame
+    monthly_returns_df = monthly_returns.reset_index()
+    monthly_returns_df.columns = ["Month", "Monthly Return (%)"]
+    monthly_returns_df["Monthly Return (%)"] *= 100  # Convert to percentage
+
+    # Display as a table
+    st.table(monthly_returns_df)
+
+    # Plot the monthly returns as a bar chart
+    fig_monthly = go.Figure()
+    fig_monthly.add_trace(go.Bar(
+        x=monthly_returns_df["Month"].astype(str),
+        y=monthly_returns_df["Monthly Return (%)"],
+        name="Monthly Returns",
+        marker=dict(color="cornflowerblue")
+    ))
+    fig_monthly.update_layout(
+        template="plotly_dark",
+        xaxis_title="Month",
+        yaxis_title="Return (%)",
+        height=500,
+        margin=dict(t=40, b=40)
+    )
+    st.plotly_chart(fig_monthly, use_container_width=True)
+
+    # Optionally, show raw simulation data (toggle with an expander)
+    with st.expander("Show Simulation Data"):
+        st.dataframe(sim_data)
+        
\ No newline at end of file
@@ -2,27 +2,34 @@ import asyncio
 import threading
 from MNDB.db_manager import DatabaseManager
 from DATACOLLECTOR.kraken_ws_data import run_kraken_collector
+from DATACOLLECTOR.kraken_trade_bars import run_kraken_trade_collector
 from DASHUI.main_dashboard import build_dash_app
-from datetime import datetime, timedelta, timezone
-from DYNAMICS.dynamic_params import DB_PATH, START_AT_MINUTES
-from DATACOLLECTOR.kraken_historical_data import fetch_kraken_ohlc
+from DYNAMICS.dynamic_params import BAR_DB_PATH, CAPTURE_RAW_WS, DB_PATH, START_AT_MINUTES, STORE_PATH, TRADE_BARS
+from MNDB.bar_db import BarDatabase
+from MNDB.candle_store import CandleStore
+from MNDB.live_ring import LiveCandleRing
+from MNDB.ws_journal import JournalWriter
+from DATACOLLECTOR.kraken_historical_data import backfill_recent
 
 db = DatabaseManager(DB_PATH)
 
-async def fetch_and_patch_gap(start_ts, end_ts, db):
-    print("🔧 Patching data gap before WebSocket starts...")
-    df = fetch_kraken_ohlc(start_ts, end_ts)
-    for _, row in df.iterrows():
-        db.save(dict(row))
-    print(f"✅ Patched {len(df)} candles from REST API.")
-    db.export_to_parquet("data/bootstrap.parquet")  # Optional bootstrapping export
+async def fetch_and_patch_gap(db, minutes=START_AT_MINUTES):
+    print("🔧 Patching data gaps before WebSocket starts...")
+    patched = await asyncio.to_thread(backfill_recent, db, minutes)
+    print(f"✅ Patched {patched} candles from REST API.")
+    if patched:
+        db.export_to_parquet("data/bootstrap.parquet")  # Optional bootstrapping export
 
 async def main():
-    end = datetime.now(tz=timezone.utc).replace(second=0, microsecond=0)
-    start = end - timedelta(minutes=START_AT_MINUTES)
-    await fetch_and_patch_gap(start, end, db)
+    await fetch_and_patch_gap(db)
+    db.export_to_store(STORE_PATH)
+    store = CandleStore(STORE_PATH)
+    ring = LiveCandleRing.create()
+    journal = JournalWriter("kraken_ohlc") if CAPTURE_RAW_WS else None
 
-    collector_task = asyncio.create_task(run_kraken_collector(db))
+    collector_task = asyncio.create_task(run_kraken_collector(db, store, ring, journal=journal))
+    bar_db = BarDatabase(BAR_DB_PATH) if TRADE_BARS else None
+    bars_task = asyncio.create_task(run_kraken_trade_collector(bar_db)) if TRADE_BARS else None
 
     def run_dash():
         app = build_dash_app()
@@ -31,7 +38,15 @@ async def main():
     dash_thread = threading.Thread(target=run_dash, daemon=True)
     dash_thread.start()
 
-    await collector_task
+    try:
+        await collector_task
+    finally:
+        if bars_task is not None:
+            bars_task.cancel()
+            bar_db.close()
+        if journal is not None:
+            journal.close()
+        ring.close()
 
 if __name__ == "__main__":
     try:
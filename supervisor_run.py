@@ -0,0 +1,236 @@
+import asyncio
+import multiprocessing as mp
+import signal
+import threading
+import time
+import urllib.request
+
+from DYNAMICS.dynamic_params import BAR_DB_PATH, CAPTURE_RAW_WS, DB_PATH, PARQUET_PATH, STORE_PATH, TRADE_BARS
+
+# Each service runs in its own interpreter, so Dash/Plotly/pandas work never
+# competes with the collector's event loop for the GIL. They only share the
+# SQLite DB, the memory-mapped candle store and the shared-memory ring.
+
+DASH_HOST = "127.0.0.1"
+DASH_PORT = 8050
+
+HEARTBEAT_TIMEOUT = 30      # seconds without a heartbeat before a restart
+STARTUP_GRACE = 180         # the collector backfills before its first heartbeat
+MAX_BACKOFF = 60
+
+
+def _exit(*_):
+    raise SystemExit(0)
+
+
+def _ignore_sigint():
+    # Ctrl-C goes to the whole process group; let the supervisor decide shutdown order.
+    # SIGTERM from the supervisor unwinds normally so `finally` blocks run.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _exit)
+
+
+# ------------------------------
+# Services (run in child processes)
+# ------------------------------
+def collector_service(heartbeat):
+    _ignore_sigint()
+    from MNDB.db_manager import DatabaseManager
+    from MNDB.candle_store import CandleStore
+    from MNDB.live_ring import LiveCandleRing
+    from DATACOLLECTOR.kraken_historical_data import backfill_recent
+    from DATACOLLECTOR.kraken_ws_data import run_kraken_collector
+    from MNDB.ws_journal import JournalWriter
+
+    db = DatabaseManager(DB_PATH)
+    print(f"🔧 Patched {backfill_recent(db)} candles from REST API.")
+    db.export_to_store(STORE_PATH)
+    store = CandleStore(STORE_PATH)
+    ring = LiveCandleRing.create()
+    journal = JournalWriter("kraken_ohlc") if CAPTURE_RAW_WS else None
+
+    async def beat():
+        # Beats from inside the event loop, so a stalled loop is detected
+        while True:
+            heartbeat.value = time.time()
+            await asyncio.sleep(1)
+
+    async def run():
+        beat_task = asyncio.create_task(beat())
+        try:
+            await run_kraken_collector(db, store, ring, export_parquet=False, journal=journal)
+        finally:
+            beat_task.cancel()
+
+    try:
+        asyncio.run(run())
+    finally:
+        if journal is not None:
+            journal.close()
+        ring.close()
+        db.close()
+
+
+def trade_bar_service(heartbeat):
+    _ignore_sigint()
+    from MNDB.bar_db import BarDatabase
+    from DATACOLLECTOR.kraken_trade_bars import run_kraken_trade_collector
+
+    bar_db = BarDatabase(BAR_DB_PATH)
+
+    async def beat():
+        while True:
+            heartbeat.value = time.time()
+            await asyncio.sleep(1)
+
+    async def run():
+        beat_task = asyncio.create_task(beat())
+        try:
+            await run_kraken_trade_collector(bar_db)
+        finally:
+            beat_task.cancel()
+
+    try:
+        asyncio.run(run())
+    finally:
+        bar_db.close()
+
+
+def dashboard_service(heartbeat):
+    _ignore_sigint()
+    from DASHUI.main_dashboard import build_dash_app
+
+    def probe():
+        # Healthy only while the server actually answers requests
+        url = f"http://{DASH_HOST}:{DASH_PORT}/cache-stats"
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=5):
+                    heartbeat.value = time.time()
+            except Exception:
+                pass
+            time.sleep(2)
+
+    threading.Thread(target=probe, daemon=True).start()
+    app = build_dash_app()
+    app.run(host=DASH_HOST, port=DASH_PORT, debug=False, use_reloader=False)
+
+
+def exporter_service(heartbeat, poll_seconds=1.0):
+    _ignore_sigint()
+    import os
+    from MNDB.db_manager import DatabaseManager
+    from MNDB.candle_store import store_version
+
+    db = DatabaseManager(DB_PATH)
+    exported = None
+    try:
+        while True:
+            heartbeat.value = time.time()
+            version = store_version(STORE_PATH) if os.path.exists(STORE_PATH) else None
+            if version is not None and version != exported:
+                db.export_to_parquet(PARQUET_PATH)
+                exported = version
+                print(f"💽 Exported to Parquet ({version[1]} candles)")
+            time.sleep(poll_seconds)
+    finally:
+        db.close()
+
+
+# ------------------------------
+# Supervisor
+# ------------------------------
+class Service:
+    def __init__(self, ctx, name, target, grace=HEARTBEAT_TIMEOUT):
+        self.ctx = ctx
+        self.name = name
+        self.target = target
+        self.grace = grace
+        self.heartbeat = ctx.Value("d", 0.0, lock=False)
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_start = 0.0
+
+    def start(self):
+        self.heartbeat.value = 0.0
+        self.process = self.ctx.Process(target=self.target, args=(self.heartbeat,), name=self.name, daemon=False)
+        self.process.start()
+        self.started_at = time.time()
+        print(f"🚀 Started {self.name} (pid {self.process.pid})")
+
+    def healthy(self, now) -> bool:
+        if self.process is None or not self.process.is_alive():
+            return False
+        last = self.heartbeat.value
+        if last == 0.0:
+            return now - self.started_at < self.grace
+        return now - last < HEARTBEAT_TIMEOUT
+
+    def stop(self, timeout=10):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.process = None
+
+    def check(self, now):
+        if self.process is None:
+            if now >= self.next_start:
+                self.start()
+            return
+        if self.healthy(now):
+            # Reset the backoff once a service has stayed up for a while
+            if now - self.started_at > 5 * HEARTBEAT_TIMEOUT:
+                self.restarts = 0
+            return
+
+        reason = "exited" if not self.process.is_alive() else "missed heartbeats"
+        self.stop()
+        delay = min(MAX_BACKOFF, 2 ** self.restarts)
+        self.restarts += 1
+        self.next_start = now + delay
+        print(f"⚠️ {self.name} {reason}, restarting in {delay}s (restart #{self.restarts})")
+
+
+def supervise(services, check_every=1.0):
+    stopping = threading.Event()
+
+    def request_stop(*_):
+        stopping.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    try:
+        while not stopping.is_set():
+            now = time.time()
+            for service in services:
+                service.check(now)
+            stopping.wait(check_every)
+    finally:
+        print("🛑 Shutting down services...")
+        # Readers first, collector (ring owner) last
+        for service in reversed(services):
+            service.stop()
+        print("✅ All services stopped.")
+
+
+def main():
+    ctx = mp.get_context("spawn")
+    services = [
+        Service(ctx, "collector", collector_service, grace=STARTUP_GRACE),
+        Service(ctx, "exporter", exporter_service),
+        Service(ctx, "dashboard", dashboard_service, grace=STARTUP_GRACE),
+    ]
+    if TRADE_BARS:
+        services.append(Service(ctx, "trade-bars", trade_bar_service))
+    supervise(services)
+
+
+if __name__ == "__main__":
+    main()